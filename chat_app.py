@@ -4,17 +4,41 @@ This module provides the main entry point for the Chainlit chat application,
 coordinating the UI, agent, and message handling components.
 """
 
+import asyncio
+
 import chainlit as cl
+
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
+# Use the libuv-based event loop when available; this must happen before
+# Chainlit creates the server loop
+if uvloop is not None:
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+
 from langchain_core.runnables import RunnableConfig
-from langchain.tools import Tool
-from langchain.agents import AgentExecutor, Agent
-import json
-from typing import Dict, List, Optional
 import functools
-import traceback
+import json
+import re
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple
 
 from utils.directory_utils import ensure_directories
 from utils.logger import logger
+from utils.semantic_cache import CachedResponse, SemanticCache
+
+if TYPE_CHECKING:
+    from langchain.agents import Agent
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Fast JSON encoder for tool-call parameters (orjson ships with langsmith)
+_dumps = orjson.dumps if orjson else lambda obj: json.dumps(obj).encode()
 
 # Suggested prompts for quick access
 SUGGESTED_PROMPTS = [
@@ -25,6 +49,114 @@ SUGGESTED_PROMPTS = [
     "Analyze the relationship between fare and survival",
 ]
 
+SUGGESTED_PROMPT_SET = frozenset(SUGGESTED_PROMPTS)
+
+# Suggested prompts message and the (constant) fields of its action buttons
+SUGGESTED_PROMPTS_HEADER = "**Suggested Prompts**\nClick any prompt below to get started:"
+SUGGESTED_ACTION_FIELDS = tuple(
+    {"name": prompt, "label": prompt, "payload": {"prompt": prompt}, "tooltip": f"Click to ask: {prompt}"}
+    for prompt in SUGGESTED_PROMPTS
+)
+
+# A numbered or bulleted list item, e.g. "1. How many women survived?" or "- Median fare"
+SUBQUERY_ITEM = re.compile(r"^\s*(?:\d+[.)]|[-*\u2022])\s+(?P<question>\S.*?)\s*$")
+
+# Openings of a list item that builds on an earlier item instead of standing alone
+DEPENDENT_SUBQUERY = re.compile(
+    r"^(?:then|and|also|next|after that|finally|so|now|why|it|its|they|them|their|those|these|that|this)\b",
+    re.IGNORECASE,
+)
+
+# Final answer the agent returns when it stops at max_iterations; it is shown but never cached
+AGENT_STOPPED_OUTPUT = "Agent stopped due to iteration limit or time limit."
+
+# Thought-process updates are sent to the client at most once per this many seconds
+THOUGHT_FLUSH_DELAY = 0.05
+
+# Embarkation port codes and the single-pass pattern that finds them in tool output
+PORT_MAPPING = {"S": "Southampton", "C": "Cherbourg", "Q": "Queenstown"}
+_PORT_RE = re.compile(f"[{''.join(PORT_MAPPING)}]")
+
+# Outputs larger than this are only scanned for port codes in their first part
+PORT_SCAN_LIMIT = 64 * 1024
+PORT_SCAN_PREFIX = 4 * 1024
+
+# Maximum number of sub-questions of one message sent to the agent at the same time
+MAX_CONCURRENT_SUBQUERIES = 4
+
+# Technical details message; token counts and tool list are filled in per update
+TECHNICAL_DETAILS_TEMPLATE = (
+    "**Technical Details**\n\n**Token Usage**\nInput tokens: {}\nOutput tokens: {}\nTotal tokens: {}\n\n**Tools Used**\n{}"
+)
+
+# Token usage as an (input, output, total) tuple
+TokenUsage = Tuple[int, int, int]
+EMPTY_TOKEN_USAGE: TokenUsage = (0, 0, 0)
+
+
+@dataclass
+class ToolCalls:
+    """Tool calls made while answering a message, stored as parallel lists.
+
+    Attributes:
+        names: Bullet-prefixed tool names, ready to be joined for display
+        params: Formatted parameter strings, aligned with ``names``
+    """
+
+    names: List[str] = field(default_factory=list)
+    params: List[str] = field(default_factory=list)
+
+    def add(self, name: str, params: str = "") -> None:
+        """Record a tool call.
+
+        Args:
+            name: Name of the tool
+            params: Formatted parameters of the call
+        """
+        self.names.append("• " + name)
+        self.params.append(params)
+
+    def extend(self, other: "ToolCalls") -> None:
+        """Append the tool calls of another ToolCalls instance."""
+        self.names.extend(other.names)
+        self.params.extend(other.params)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+
+def to_token_usage(usage_metadata: Dict[str, int]) -> TokenUsage:
+    """Convert LangChain usage metadata to an (input, output, total) tuple."""
+    return (
+        usage_metadata.get("input_tokens", 0),
+        usage_metadata.get("output_tokens", 0),
+        usage_metadata.get("total_tokens", 0),
+    )
+
+
+def plan_subqueries(content: str) -> List[str]:
+    """Split a compound question into independent sub-questions.
+
+    Only a message that is a numbered or bulleted list of two or more questions
+    is split, one sub-question per item. Any other message, including one with
+    several sentences or lines, and a list with an item that builds on another
+    (e.g. "then compute the survival rate for women") stays a single question.
+
+    Args:
+        content: The user's message
+
+    Returns:
+        The sub-questions, or a single-element list with the original message
+    """
+    items = [SUBQUERY_ITEM.match(line) for line in content.splitlines() if line.strip()]
+    if len(items) < 2 or not all(items):
+        return [content]
+    questions = [item["question"] for item in items]
+    if any(DEPENDENT_SUBQUERY.match(question) for question in questions):
+        return [content]
+    return questions
+
+
 # Ensure directories exist at application startup
 ensure_directories()
 
@@ -38,41 +170,65 @@ class MessageManager:
 
     Attributes:
         _instance: The singleton instance of the MessageManager.
+        _update_impl: The update strategy, selected once at import time.
     """
 
     _instance = None
+    _update_impl = None
 
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super(MessageManager, cls).__new__(cls)
         return cls._instance
 
+    @staticmethod
+    async def _update_via_api(message: cl.Message, content: str) -> None:
+        """Update a message in place through ``Message.update``."""
+        message.content = content
+        await message.update()
+
+    @staticmethod
+    async def _update_via_resend(message: cl.Message, content: str) -> None:
+        """Send the content as a new message (for Chainlit versions without ``update``)."""
+        await cl.Message(content=content, author=message.author).send()
+
     @staticmethod
     async def update_message(message: cl.Message, content: str) -> None:
-        """Update a message's content safely.
+        """Update a message's content.
 
         Args:
             message: The Chainlit message to update
             content: The new content for the message
 
         Note:
-            This method handles the update in a way that's compatible with
-            Chainlit 2.5.5's message update interface.
+            The update strategy is selected once at import time, based on whether
+            the installed Chainlit version supports ``Message.update`` (Chainlit
+            2.5.5 does), so this hot path has no try/except or attribute probing.
+        """
+        await MessageManager._update_impl(message, content)
+
+    @staticmethod
+    async def update_message_safe(message: cl.Message, content: str) -> None:
+        """Update a message's content, falling back to a new message on failure.
+
+        Args:
+            message: The Chainlit message to update
+            content: The new content for the message
         """
         try:
-            await message.update()
-            message.content = content
+            await MessageManager._update_impl(message, content)
         except Exception as e:
             logger.error(f"Error updating message: {str(e)}", exc_info=True)
-            # Fallback to creating a new message if update fails
-            await cl.Message(content=content, author=message.author).send()
+            await MessageManager._update_via_resend(message, content)
 
     @staticmethod
     def log_error(func):
         """Decorator to log errors with full context.
 
         This decorator wraps async functions to provide detailed error logging,
-        including function name, arguments, and full traceback.
+        including function name and full traceback. The arguments are only logged
+        when ``LOG_CALL_ARGS`` is enabled, since Chainlit objects have expensive
+        reprs. Formatting is left to the logging handler.
 
         Args:
             func: The async function to wrap
@@ -81,19 +237,32 @@ class MessageManager:
             The wrapped function with enhanced error logging
         """
 
-        @functools.wraps(func)
         async def wrapper(*args, **kwargs):
             try:
                 return await func(*args, **kwargs)
             except Exception as e:
-                logger.error(
-                    f"Error in {func.__name__}: {str(e)}\nArgs: {args}\nKwargs: {kwargs}\nTraceback: {traceback.format_exc()}"
-                )
+                from config import config
+
+                if config.app.log_call_args:
+                    logger.error("Error in %s: %s\nArgs: %s\nKwargs: %s", func.__name__, e, args, kwargs, exc_info=True)
+                else:
+                    logger.error("Error in %s: %s", func.__name__, e, exc_info=True)
                 raise
 
+        # Chainlit inspects the signature of the wrapped function via __wrapped__
+        wrapper.__wrapped__ = func
+        wrapper.__name__ = func.__name__
+        wrapper.__qualname__ = func.__qualname__
+        wrapper.__doc__ = func.__doc__
         return wrapper
 
 
+# Select the message update strategy once, based on the installed Chainlit API
+MessageManager._update_impl = (
+    MessageManager._update_via_api if callable(getattr(cl.Message, "update", None)) else MessageManager._update_via_resend
+)
+
+
 class ChatUI:
     """Handles all UI-related functionality for the chat interface.
 
@@ -111,8 +280,11 @@ class ChatUI:
         self.technical_msg = None
         self.thoughts_msg = None
         self.message_manager = MessageManager()
+        # Debounced thought-process updates: only the latest content is sent
+        self._pending_thought: Optional[str] = None
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._flush_task: Optional[asyncio.Task] = None
 
-    @MessageManager.log_error
     async def initialize_technical_details(self):
         """Initialize the technical details message with token usage and tool information.
 
@@ -121,53 +293,43 @@ class ChatUI:
         throughout the conversation.
         """
         self.technical_msg = cl.Message(
-            content="**Technical Details**\n\n**Token Usage**\nInput tokens: 0\nOutput tokens: 0\nTotal tokens: 0\n\n**Tools Used**\nNone",
+            content=TECHNICAL_DETAILS_TEMPLATE.format(*EMPTY_TOKEN_USAGE, "None"),
             author="System",
         )
         await self.technical_msg.send()
 
-    @MessageManager.log_error
-    async def update_technical_details(self, token_usage: Dict[str, int], tool_calls: List[Dict]):
+    async def update_technical_details(self, token_usage: TokenUsage, tool_calls: ToolCalls):
         """Update the technical details message with new token usage and tool information.
 
         Args:
-            token_usage: Dictionary containing input, output, and total token counts
-            tool_calls: List of tools used in the current interaction
+            token_usage: Tuple of input, output, and total token counts
+            tool_calls: Tools used in the current interaction
         """
         if not self.technical_msg:
             return
 
-        content = "**Technical Details**\n\n"
-        content += "**Token Usage**\n"
-        content += f"Input tokens: {token_usage.get('input_tokens', 0)}\n"
-        content += f"Output tokens: {token_usage.get('output_tokens', 0)}\n"
-        content += f"Total tokens: {token_usage.get('total_tokens', 0)}\n\n"
-        content += "**Tools Used**\n"
-
-        if tool_calls:
-            content += "\n".join([f"• {call['name']}" for call in tool_calls])
-        else:
-            content += "None"
+        tools = "\n".join(tool_calls.names) if tool_calls.names else "None"
+        content = TECHNICAL_DETAILS_TEMPLATE.format(*token_usage, tools)
 
-        await self.message_manager.update_message(self.technical_msg, content)
+        await self.message_manager.update_message_safe(self.technical_msg, content)
 
-    @MessageManager.log_error
     async def display_suggested_prompts(self):
         """Display suggested prompts as interactive buttons.
 
         Creates a message with clickable action buttons for each suggested prompt.
         These buttons allow users to quickly start common queries.
-        """
-        elements = [
-            cl.Action(name=prompt, label=prompt, payload={"prompt": prompt}, description=f"Click to ask: {prompt}")
-            for prompt in SUGGESTED_PROMPTS
-        ]
 
-        await cl.Message(
-            content="**Suggested Prompts**\nClick any prompt below to get started:", author="System", elements=elements
-        ).send()
+        Note:
+            Chainlit assigns each sent action to its message (``forId``), so the
+            Action objects are created per message from precomputed fields.
+        """
+        try:
+            actions = [cl.Action(**fields) for fields in SUGGESTED_ACTION_FIELDS]
+            await cl.Message(content=SUGGESTED_PROMPTS_HEADER, author="System", actions=actions).send()
+        except Exception as e:
+            logger.error("Error displaying suggested prompts: %s", e, exc_info=True)
+            raise
 
-    @MessageManager.log_error
     async def start_thought_process(self):
         """Start displaying the agent's thought process.
 
@@ -189,10 +351,12 @@ class ChatUI:
         self.thoughts_msg = cl.Message(content="🤔 **Analyzing your question...**", author="Assistant")
         await self.thoughts_msg.send()
 
-    @MessageManager.log_error
     async def update_thought_process(self, thought: str, is_tool_call: bool = False):
         """Update the thought process message with new information.
 
+        The update is debounced: the message is sent to the client at most once
+        per ``THOUGHT_FLUSH_DELAY`` seconds, with the latest content.
+
         Args:
             thought: The current thought or processing step to display
             is_tool_call: Whether this update is about a tool being called
@@ -200,24 +364,44 @@ class ChatUI:
         if self.thoughts_msg:
             # Format tool calls differently
             if is_tool_call:
-                content = f"🔧 **Using tool:** {thought}"
+                self._pending_thought = f"🔧 **Using tool:** {thought}"
             else:
-                content = f"💭 **Thinking:** {thought}"
+                self._pending_thought = f"💭 **Thinking:** {thought}"
+
+            if self._flush_handle is None:
+                self._flush_handle = asyncio.get_running_loop().call_later(THOUGHT_FLUSH_DELAY, self._start_thought_flush)
 
-            await self.message_manager.update_message(self.thoughts_msg, content)
+    def _start_thought_flush(self) -> None:
+        """Start sending the pending thought (scheduled via ``call_later``)."""
+        self._flush_handle = None
+        self._flush_task = asyncio.ensure_future(self._flush_thought())
+
+    async def _flush_thought(self) -> None:
+        """Send the latest pending thought to the client."""
+        content, self._pending_thought = self._pending_thought, None
+        if self.thoughts_msg and content is not None:
+            try:
+                await self.message_manager.update_message(self.thoughts_msg, content)
+            except Exception as e:
+                logger.error(f"Error updating thought process: {str(e)}", exc_info=True)
 
-    @MessageManager.log_error
     async def end_thought_process(self):
         """End the thought process display.
 
-        Updates the thought process message to indicate completion
-        and cleans up the message reference.
+        Drops any pending thought update, then updates the thought process
+        message to indicate completion and cleans up the message reference.
         """
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        self._pending_thought = None
+        if self._flush_task is not None and not self._flush_task.done():
+            await self._flush_task
+
         if self.thoughts_msg:
             await self.message_manager.update_message(self.thoughts_msg, "✅ **Analysis Complete**")
             self.thoughts_msg = None
 
-    @MessageManager.log_error
     async def display_error(self, error_msg: str):
         """Display an error message to the user.
 
@@ -227,6 +411,85 @@ class ChatUI:
         await cl.Message(content=f"I apologize, but I encountered an error: {error_msg}", author="Assistant").send()
 
 
+@dataclass
+class _ResponseState:
+    """What has been extracted from an agent response so far."""
+
+    final_answer: Optional[str] = None
+    tool_calls: ToolCalls = field(default_factory=ToolCalls)
+    token_usage: TokenUsage = EMPTY_TOKEN_USAGE
+
+
+async def _on_thought(thought: str, ui: ChatUI, state: _ResponseState) -> None:
+    """Handle the thought process of a response message."""
+    await ui.update_thought_process(thought)
+
+
+async def _on_tool_calls(calls: List[Dict], ui: ChatUI, state: _ResponseState) -> None:
+    """Handle the tool calls of a response message."""
+    update_thought_process = ui.update_thought_process
+    for call in calls:
+        # Format tool call parameters if available
+        params = call.get("parameters")
+        param_str = " with parameters: " + _dumps(params).decode("utf-8") if params else ""
+        state.tool_calls.add(call["name"], param_str)
+        await update_thought_process(f"{call['name']}{param_str}", is_tool_call=True)
+
+
+async def _on_tool_output(output: str, ui: ChatUI, state: _ResponseState) -> None:
+    """Handle the tool output of a response message."""
+    await ui.update_thought_process(f"Tool output: {output}")
+
+
+async def _on_content(content: str, ui: ChatUI, state: _ResponseState) -> None:
+    """Handle the content (final answer) of a response message."""
+    if content:
+        state.final_answer = content
+        await ui.update_thought_process(f"Formulating response: {content[:100]}...")
+
+
+async def _on_usage_metadata(usage_metadata: Dict[str, int], ui: ChatUI, state: _ResponseState) -> None:
+    """Handle the token usage of a response message."""
+    state.token_usage = to_token_usage(usage_metadata)
+
+
+# Response message fields and their handlers, in processing order
+_MESSAGE_FIELD_HANDLERS = (
+    ("thought", _on_thought),
+    ("tool_calls", _on_tool_calls),
+    ("tool_output", _on_tool_output),
+    ("content", _on_content),
+    ("usage_metadata", _on_usage_metadata),
+)
+
+# Handlers per message class, resolved once per class
+_MESSAGE_DISPATCH: Dict[type, Tuple[Tuple[str, Callable], ...]] = {}
+
+
+def _message_handlers(msg_obj: Any) -> Tuple[Tuple[str, Callable], ...]:
+    """Return the (field, handler) pairs that apply to a response message.
+
+    LangChain messages are pydantic models with a fixed set of fields, so the
+    applicable handlers are resolved once per message class. Other objects are
+    inspected per instance.
+
+    Args:
+        msg_obj: A message from the agent response
+
+    Returns:
+        The (field name, handler) pairs for the fields the message has
+    """
+    cls = type(msg_obj)
+    handlers = _MESSAGE_DISPATCH.get(cls)
+    if handlers is None:
+        model_fields = getattr(cls, "model_fields", None)
+        if model_fields is None:
+            return tuple((name, handler) for name, handler in _MESSAGE_FIELD_HANDLERS if hasattr(msg_obj, name))
+        handlers = tuple((name, handler) for name, handler in _MESSAGE_FIELD_HANDLERS if name in model_fields)
+        _MESSAGE_DISPATCH[cls] = handlers
+    return handlers
+
+
 class ChatAgent:
     """Handles agent-related functionality for processing user queries.
 
@@ -238,8 +501,8 @@ class ChatAgent:
         search_tool: Tool for web searches
         pandas_agent: Tool for data analysis
         pandas_tool: Wrapped pandas agent for the agent system
-        checkpointer: For saving agent state
         agent: The main agent instance
+        cache: Exact-match + semantic cache of previous answers
     """
 
     def __init__(self):
@@ -251,8 +514,18 @@ class ChatAgent:
         - Port mapping for embarkation locations
         - Error handling and retry logic
         """
+        # Imported here rather than at module level: langchain.agents takes most of
+        # a second to import, which would be paid on every auto-reload
+        from langchain.agents import AgentExecutor
+        from langchain.tools import Tool
+
+        from config import config
+
+        # Shared application logger; its file output is written by a background thread
+        self.logger = logger
+
         # Port mapping for embarkation locations
-        self.port_mapping = {"S": "Southampton", "C": "Cherbourg", "Q": "Queenstown"}
+        self.port_mapping = PORT_MAPPING
 
         # Initialize tools
         self.tools = [
@@ -276,7 +549,10 @@ class ChatAgent:
             return_intermediate_steps=True,
         )
 
-    def _create_agent(self) -> Agent:
+        # Cache answers so repeated questions skip the LLM entirely
+        self.cache = SemanticCache(model_name=config.model.name, temperature=config.model.temperature)
+
+    def _create_agent(self) -> "Agent":
         """Create the agent with enhanced configuration.
 
         Returns:
@@ -285,6 +561,8 @@ class ChatAgent:
             - Port mapping awareness
             - Error handling
         """
+        from langchain.agents import Agent
+
         return Agent(
             llm_chain=self._create_llm_chain(),
             allowed_tools=[tool.name for tool in self.tools],
@@ -308,25 +586,69 @@ class ChatAgent:
             It also handles port mapping for embarkation locations.
         """
         try:
-            self.logger.debug(f"Executing Python code: {code}")
+            self.logger.debug("Executing Python code: %s", code)
             result = await self._execute_python_code(code)
 
-            # Check if the result contains port codes
-            if isinstance(result, str) and any(port in result for port in self.port_mapping.keys()):
-                self.logger.info(f"Detected port codes in result: {result}")
-                # Log the mapping for debugging
-                for code, name in self.port_mapping.items():
-                    if code in result:
-                        self.logger.info(f"Mapped port code {code} to {name}")
+            # Check if the result contains port codes (large outputs: the start is representative)
+            if isinstance(result, str):
+                scanned = result[:PORT_SCAN_PREFIX] if len(result) > PORT_SCAN_LIMIT else result
+                if _PORT_RE.search(scanned):
+                    self.logger.info("Detected port codes in result: %s", result)
+                    # Log the mapping for debugging
+                    for port in set(_PORT_RE.findall(scanned)):
+                        self.logger.info("Mapped port code %s to %s", port, self.port_mapping[port])
 
             return result
         except Exception as e:
             self.logger.error(f"Error executing Python code: {str(e)}", exc_info=True)
             raise e
 
-    async def process_message(self, message: cl.Message, ui: ChatUI) -> tuple[Optional[str], List[Dict], Dict[str, int]]:
+    async def _invoke(self, content: str, thread_id: str, semaphore: Optional[asyncio.Semaphore] = None) -> Dict:
+        """Invoke the agent for a single (sub-)question.
+
+        Args:
+            content: The question to answer
+            thread_id: Thread ID of the run (shown in traces); distinct per sub-question
+            semaphore: Semaphore bounding the concurrent calls of one fan-out, if any
+
+        Returns:
+            The raw agent response
+        """
+        run_config = RunnableConfig(configurable={"thread_id": thread_id})
+        inputs = {"messages": content}
+        if semaphore is None:
+            return await self.agent.ainvoke(inputs, config=run_config)
+        async with semaphore:
+            return await self.agent.ainvoke(inputs, config=run_config)
+
+    async def _process_response(self, response: Dict, ui: ChatUI) -> tuple[Optional[str], ToolCalls, TokenUsage]:
+        """Extract the final answer, tool calls, and token usage from an agent response.
+
+        Args:
+            response: The raw agent response
+            ui: The ChatUI instance for displaying progress
+
+        Returns:
+            A tuple containing the final answer, the tool calls, and the token usage
+        """
+        state = _ResponseState()
+
+        if isinstance(response, dict) and "messages" in response:
+            for msg_obj in response["messages"]:
+                for field_name, handler in _message_handlers(msg_obj):
+                    value = getattr(msg_obj, field_name)
+                    if value is not None:
+                        await handler(value, ui, state)
+
+        return state.final_answer, state.tool_calls, state.token_usage
+
+    async def process_message(self, message: cl.Message, ui: ChatUI) -> tuple[Optional[str], ToolCalls, TokenUsage]:
         """Process a user message and return the response, tool calls, and token usage.
 
+        A list of independent questions (see plan_subqueries) is split into
+        sub-questions that are sent to the agent concurrently; their answers are
+        merged into a single response.
+
         Args:
             message: The user's message to process
             ui: The ChatUI instance for displaying progress
@@ -334,49 +656,59 @@ class ChatAgent:
         Returns:
             A tuple containing:
             - The final answer (str or None)
-            - List of tool calls made
-            - Dictionary of token usage statistics
+            - The tool calls made
+            - Tuple of input, output, and total token counts
         """
-        config = RunnableConfig(configurable={"thread_id": message.id, "checkpoint_ns": "chat", "checkpoint_id": message.id})
-
         try:
+            # Answer from the cache when the question (or a similar one) was asked before
+            cached = await self.cache.get(message.content)
+            if cached is not None:
+                await ui.update_thought_process("Found a cached answer to this question")
+                return cached.answer, ToolCalls(), cached.token_usage
+
             # Update thought process with initial analysis
             await ui.update_thought_process("Analyzing your question...")
 
-            response = await self.agent.ainvoke({"messages": message.content}, config=config)
-
-            final_answer = None
-            tool_calls = []
-            token_usage = {}
-
-            if isinstance(response, dict) and "messages" in response:
-                messages = response["messages"]
-                for msg_obj in messages:
-                    # Handle thought process
-                    if hasattr(msg_obj, "thought"):
-                        await ui.update_thought_process(msg_obj.thought)
-
-                    # Handle tool calls
-                    if hasattr(msg_obj, "tool_calls"):
-                        tool_calls.extend(msg_obj.tool_calls)
-                        for call in msg_obj.tool_calls:
-                            # Format tool call parameters if available
-                            params = call.get("parameters", {})
-                            param_str = f" with parameters: {json.dumps(params)}" if params else ""
-                            await ui.update_thought_process(f"{call['name']}{param_str}", is_tool_call=True)
-
-                    # Handle tool outputs
-                    if hasattr(msg_obj, "tool_output"):
-                        await ui.update_thought_process(f"Tool output: {msg_obj.tool_output}")
-
-                    # Handle final answer
-                    if hasattr(msg_obj, "content") and msg_obj.content:
-                        final_answer = msg_obj.content
-                        await ui.update_thought_process(f"Formulating response: {msg_obj.content[:100]}...")
-
-                    # Handle token usage
-                    if hasattr(msg_obj, "usage_metadata"):
-                        token_usage = msg_obj.usage_metadata
+            subqueries = plan_subqueries(message.content)
+            if len(subqueries) == 1:
+                # Fast path: a single question needs no fan-out
+                response = await self._invoke(message.content, message.id)
+                final_answer, tool_calls, token_usage = await self._process_response(response, ui)
+                complete = final_answer != AGENT_STOPPED_OUTPUT
+            else:
+                await ui.update_thought_process(f"Answering {len(subqueries)} sub-questions in parallel...")
+                # Bound the concurrent calls of this message to respect Gemini rate limits;
+                # the agent is shared, so a semaphore on it would limit all users together
+                semaphore = asyncio.Semaphore(MAX_CONCURRENT_SUBQUERIES)
+                responses = await asyncio.gather(
+                    *(self._invoke(query, f"{message.id}-{i}", semaphore) for i, query in enumerate(subqueries)),
+                    return_exceptions=True,
+                )
+
+                answers = []
+                tool_calls = ToolCalls()
+                token_usage = EMPTY_TOKEN_USAGE
+                # A merged answer is only cached when every sub-question was answered
+                complete = True
+                for query, response in zip(subqueries, responses):
+                    if isinstance(response, Exception):
+                        logger.error(f"Error answering sub-question '{query}': {str(response)}")
+                        complete = False
+                        continue
+                    answer, calls, usage = await self._process_response(response, ui)
+                    if answer:
+                        answers.append(answer)
+                    if not answer or answer == AGENT_STOPPED_OUTPUT:
+                        complete = False
+                    tool_calls.extend(calls)
+                    token_usage = tuple(total + count for total, count in zip(token_usage, usage))
+
+                if not answers and all(isinstance(response, Exception) for response in responses):
+                    raise responses[0]
+                final_answer = "\n\n".join(answers) if answers else None
+
+            if final_answer and complete:
+                await self.cache.put(message.content, CachedResponse(answer=final_answer, token_usage=token_usage))
 
             return final_answer, tool_calls, token_usage
 
@@ -384,27 +716,39 @@ class ChatAgent:
             raise e
 
 
-# Initialize UI and Agent
+# Initialize UI; the agent is created on first use
 ui = ChatUI()
-agent = ChatAgent()
+
+
+@functools.lru_cache(maxsize=1)
+def _get_agent() -> ChatAgent:
+    """Create the chat agent on first use.
+
+    Returns:
+        The shared ChatAgent instance
+    """
+    return ChatAgent()
 
 
 @cl.on_chat_start
-@MessageManager.log_error
 async def start():
     """Initialize the chat session.
 
     This function is called when a new chat session starts.
     It sets up the technical details display and shows suggested prompts.
     """
-    # Ensure directories exist
-    ensure_directories()
+    try:
+        # Ensure directories exist
+        ensure_directories()
 
-    # Initialize technical details
-    await ui.initialize_technical_details()
+        # Initialize technical details
+        await ui.initialize_technical_details()
 
-    # Display suggested prompts
-    await ui.display_suggested_prompts()
+        # Display suggested prompts
+        await ui.display_suggested_prompts()
+    except Exception as e:
+        logger.error("Error starting chat session: %s", e, exc_info=True)
+        raise
 
 
 @cl.on_message
@@ -441,7 +785,7 @@ async def handle_message(message: cl.Message):
 
         # Process the message through the agent
         # This includes question analysis, tool selection, and response generation
-        final_answer, tool_calls, token_usage = await agent.process_message(message, ui)
+        final_answer, tool_calls, token_usage = await _get_agent().process_message(message, ui)
 
         # Create a message for the response
         # This message will be updated with the streaming response
@@ -457,7 +801,7 @@ async def handle_message(message: cl.Message):
         await ui.end_thought_process()
 
         # Update technical details with token usage and tool information
-        if token_usage:
+        if any(token_usage):
             await ui.update_technical_details(token_usage, tool_calls)
 
     except Exception as e:
@@ -465,11 +809,6 @@ async def handle_message(message: cl.Message):
         await ui.display_error(str(e))
 
 
-@cl.action_callback("Analyze the survival rate by passenger class")
-@cl.action_callback("What was the average age of survivors?")
-@cl.action_callback("What was the name and age of the oldest female survivor?")
-@cl.action_callback("What was the most common embarkation port?")
-@cl.action_callback("Analyze the relationship between fare and survival")
 @MessageManager.log_error
 async def on_action(action: cl.Action):
     """Handle action callbacks for suggested prompts.
@@ -480,6 +819,9 @@ async def on_action(action: cl.Action):
     Args:
         action: The action that was clicked, containing the prompt
     """
+    if action.name not in SUGGESTED_PROMPT_SET:
+        return
+
     try:
         # Get the prompt from the action payload
         prompt = action.payload.get("prompt")
@@ -498,6 +840,15 @@ async def on_action(action: cl.Action):
         await ui.display_error(str(e))
 
 
+def _register_prompt_actions() -> None:
+    """Register the single handler for every suggested prompt (action names are the prompts)."""
+    for prompt in SUGGESTED_PROMPTS:
+        cl.action_callback(prompt)(on_action)
+
+
+_register_prompt_actions()
+
+
 def main():
     """Run the Chainlit application.
 
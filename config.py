@@ -1,14 +1,46 @@
 """Configuration management for the chatbot workshop project."""
 
+import functools
 import os
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Optional
+from typing import Any, Optional
 
 from dotenv import load_dotenv
 
-# Load environment variables
-load_dotenv()
+
+VALID_LOG_LEVELS = frozenset({"DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"})
+VALID_PORTS = range(1, 65536)
+
+# Directories already created (or found) by this process
+_ensured_dirs: set = set()
+
+
+def _ensure_dir(path: Path) -> None:
+    """Create a directory unless this process already ensured it exists.
+
+    Args:
+        path: The directory to create
+    """
+    if path in _ensured_dirs:
+        return
+    if not path.exists():
+        path.mkdir(parents=True, exist_ok=True)
+    _ensured_dirs.add(path)
+
+
+@functools.lru_cache(maxsize=None)
+def _cached_getenv(name: str, default: Optional[str] = None) -> Optional[str]:
+    """Read an environment variable once; the environment is fixed after startup.
+
+    Args:
+        name: Name of the environment variable
+        default: Value returned when the variable is not set
+
+    Returns:
+        The value of the environment variable, or the default
+    """
+    return os.environ.get(name, default)
 
 
 class ConfigurationError(Exception):
@@ -23,7 +55,7 @@ class MissingAPIKeyError(ConfigurationError):
     pass
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class ModelConfig:
     """Configuration for language models."""
 
@@ -36,13 +68,8 @@ class ModelConfig:
     @classmethod
     def from_env(cls) -> "ModelConfig":
         """Create ModelConfig from environment variables."""
-        return cls(
-            name=os.getenv("MODEL_NAME", "gemini-pro"),
-            temperature=float(os.getenv("MODEL_TEMPERATURE", "0.3")),
-            max_tokens=int(os.getenv("MODEL_MAX_TOKENS", "8192")),
-            top_p=float(os.getenv("MODEL_TOP_P", "0.8")),
-            top_k=int(os.getenv("MODEL_TOP_K", "20")),
-        )
+        env = os.environ
+        return cls(*(cast(env.get(name, default)) for name, default, cast in _MODEL_FIELDS))
 
     def validate(self) -> None:
         """Validate model configuration values.
@@ -63,7 +90,17 @@ class ModelConfig:
             raise ConfigurationError(f"Top-k must be positive, got {self.top_k}")
 
 
-@dataclass
+# Environment variable, default and type of each ModelConfig field, in field order
+_MODEL_FIELDS = (
+    ("MODEL_NAME", "gemini-pro", str),
+    ("MODEL_TEMPERATURE", "0.3", float),
+    ("MODEL_MAX_TOKENS", "8192", int),
+    ("MODEL_TOP_P", "0.8", float),
+    ("MODEL_TOP_K", "20", int),
+)
+
+
+@dataclass(slots=True, frozen=True)
 class DataPipelineConfig:
     """Configuration for data pipelines."""
 
@@ -72,7 +109,7 @@ class DataPipelineConfig:
     titanic_db_name: str = "titanic.db"
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class VectorStoreConfig:
     """Configuration for vector stores."""
 
@@ -81,7 +118,7 @@ class VectorStoreConfig:
     persist_directory: Path = Path("vector_store")
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class MemoryConfig:
     """Configuration for conversation memory."""
 
@@ -90,12 +127,16 @@ class MemoryConfig:
     max_tokens: int = 2000
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class AppConfig:
     """Configuration for the application."""
 
     debug: bool = False
     log_level: str = "INFO"
+    # Include handler arguments in error logs (their reprs can be expensive)
+    log_call_args: bool = field(default_factory=lambda: _cached_getenv("LOG_CALL_ARGS", "false").lower() == "true")
+    # Threads PyTorch uses in this process, set when the embedding model loads (0 keeps PyTorch's default)
+    embedding_num_threads: int = field(default_factory=lambda: int(_cached_getenv("EMBEDDING_NUM_THREADS", "0")))
     port: int = 8000
     host: str = "localhost"
 
@@ -122,25 +163,25 @@ class Config:
         Raises:
             MissingAPIKeyError: If the key is missing or empty
         """
-        key = os.getenv(key_name)
+        key = _cached_getenv(key_name)
         if not key:
             raise MissingAPIKeyError(f"Required API key '{key_name}' is missing or empty")
         return key
 
-    @property
+    @functools.cached_property
     def google_api_key(self) -> str:
         """Get the Google API key."""
         return self.get_api_key("GOOGLE_API_KEY")
 
-    @property
+    @functools.cached_property
     def openai_api_key(self) -> Optional[str]:
         """Get the OpenAI API key if available."""
-        return os.getenv("OPENAI_API_KEY")
+        return _cached_getenv("OPENAI_API_KEY")
 
-    @property
+    @functools.cached_property
     def huggingface_api_key(self) -> Optional[str]:
         """Get the HuggingFace API key if available."""
-        return os.getenv("HUGGINGFACE_API_KEY")
+        return _cached_getenv("HUGGINGFACE_API_KEY")
 
     def validate(self) -> None:
         """Validate the configuration.
@@ -152,22 +193,43 @@ class Config:
         self.model.validate()
 
         # Ensure required directories exist
-        self.pipeline.data_sources_dir.mkdir(parents=True, exist_ok=True)
+        _ensure_dir(self.pipeline.data_sources_dir)
         if self.vector_store.enabled:
-            self.vector_store.persist_directory.mkdir(parents=True, exist_ok=True)
+            _ensure_dir(self.vector_store.persist_directory)
 
         # Validate log level
-        valid_log_levels = {"DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"}
-        if self.app.log_level not in valid_log_levels:
+        if self.app.log_level not in VALID_LOG_LEVELS:
             raise ConfigurationError(f"Invalid log level: {self.app.log_level}")
 
         # Validate port number
-        if not 0 < self.app.port < 65536:
+        if self.app.port not in VALID_PORTS:
             raise ConfigurationError(f"Invalid port number: {self.app.port}")
 
+        # Validate embedding thread count
+        if self.app.embedding_num_threads < 0:
+            raise ConfigurationError(f"Embedding thread count must not be negative, got {self.app.embedding_num_threads}")
+
+
+@functools.lru_cache(maxsize=1)
+def get_config() -> Config:
+    """Load the environment, then create and validate the global configuration.
+
+    The configuration is created on first use instead of on import, so modules
+    that import this one without using the configuration skip the .env read.
+
+    Returns:
+        The validated global Config instance
+    """
+    # Load environment variables
+    load_dotenv()
+
+    config = Config()
+    config.validate()
+    return config
 
-# Create global config instance
-config = Config()
 
-# Validate configuration on import
-config.validate()
+def __getattr__(name: str) -> Any:
+    """Create the global ``config`` on first access (``from config import config``)."""
+    if name == "config":
+        return get_config()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
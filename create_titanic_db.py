@@ -1,22 +1,20 @@
-from datasets import load_dataset
-from sqlalchemy import create_engine
+import sqlite3
 
+from data_pipeline.titanic_pipeline import run_titanic_pipeline
 
-def create_titanic_database():
-    # Load the Titanic dataset from Hugging Face
-    dataset = load_dataset("mstz/titanic")["train"]
-    titanic_df = dataset.to_pandas()
 
-    # Create SQLite database engine
-    engine = create_engine("sqlite:///titanic.sqlite")
+def create_titanic_database():
+    # Download the Titanic CSV and convert it to SQLite through the data pipeline
+    db_path = run_titanic_pipeline()
 
-    # Store the DataFrame in SQLite
-    titanic_df.to_sql("titanic", engine, if_exists="replace", index=False)
+    with sqlite3.connect(db_path) as connection:
+        count = connection.execute("SELECT COUNT(*) FROM titanic").fetchone()[0]
+        columns = [row[1] for row in connection.execute("PRAGMA table_info(titanic)")]
 
-    print("Titanic dataset has been successfully stored in titanic.sqlite")
-    print(f"Number of records: {len(titanic_df)}")
+    print(f"Titanic dataset has been successfully stored in {db_path}")
+    print(f"Number of records: {count}")
     print("\nColumns in the database:")
-    for col in titanic_df.columns:
+    for col in columns:
         print(f"- {col}")
 
 
@@ -1,17 +1,20 @@
-"""Script to inspect and validate the Titanic dataset from Hugging Face.
+"""Script to inspect and validate the Titanic dataset (the pipeline's source CSV).
 This script focuses on validating the dataset structure and data quality before it enters our pipeline."""
 
-from datasets import load_dataset
 import logging
 from typing import Dict, Any
 
+import pandas as pd
+
+from data_pipeline.titanic_pipeline import download_titanic_dataset, find_name_columns
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
 
 
 def validate_titanic_dataset() -> Dict[str, Any]:
-    """Validate the Titanic dataset from Hugging Face.
+    """Validate the Titanic dataset CSV that the pipeline ingests.
 
     Returns:
         Dict containing validation results including:
@@ -21,12 +24,10 @@ def validate_titanic_dataset() -> Dict[str, Any]:
         - missing_values: Count of missing values per column
         - name_columns: List of name-related columns (for privacy review)
     """
-    # Load the dataset
-    logger.info("Loading mstz/titanic dataset from Hugging Face...")
-    dataset = load_dataset("mstz/titanic")
-
-    # Convert to pandas for easier inspection
-    df = dataset["train"].to_pandas()
+    # Load the dataset (downloaded once by the pipeline)
+    csv_path = download_titanic_dataset()
+    logger.info(f"Loading Titanic dataset from {csv_path}...")
+    df = pd.read_csv(csv_path)
 
     # Basic information
     validation_results = {
@@ -37,24 +38,25 @@ def validate_titanic_dataset() -> Dict[str, Any]:
     }
 
     # Check for name-related columns
-    name_cols = [col for col in df.columns if "name" in col.lower()]
+    name_cols = find_name_columns(df.columns)
     validation_results["name_columns"] = name_cols
 
-    # Log validation results
-    logger.info(f"\nDataset shape: {validation_results['shape']}")
-    logger.info(f"\nColumns: {validation_results['columns']}")
-    logger.info("\nData types:")
-    for col, dtype in validation_results["dtypes"].items():
-        logger.info(f"- {col}: {dtype}")
-
-    logger.info("\nMissing values:")
-    for col, count in validation_results["missing_values"].items():
-        if count > 0:
-            logger.info(f"- {col}: {count} missing values")
+    # Log validation results, one record per section
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("\nDataset shape: %s", validation_results["shape"])
+        logger.info("\nColumns: %s", validation_results["columns"])
+        dtypes = "\n".join(f"- {col}: {dtype}" for col, dtype in validation_results["dtypes"].items())
+        logger.info("\nData types:\n%s", dtypes)
+        missing = "\n".join(
+            f"- {col}: {count} missing values" for col, count in validation_results["missing_values"].items() if count > 0
+        )
+        logger.info("\nMissing values:\n%s", missing)
 
     if name_cols:
-        logger.warning(f"\nFound name-related columns: {name_cols}")
-        logger.warning("Note: These columns will be removed in the pipeline for privacy reasons")
+        logger.warning(
+            "\nFound name-related columns: %s\nNote: These columns will be removed in the pipeline for privacy reasons",
+            name_cols,
+        )
     else:
         logger.info("\nNo name-related columns found in the dataset")
 
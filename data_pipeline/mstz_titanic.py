@@ -0,0 +1,50 @@
+"""Local copy of the mstz/titanic dataset from Hugging Face.
+
+The dataset is fetched once with ``scripts/cache_titanic.py`` (``cache-titanic``)
+and stored as Parquet, so the diagnostics and tools read a local file instead of
+importing ``datasets`` and contacting the Hugging Face hub on every run.
+"""
+
+from typing import List, Optional
+
+import pandas as pd
+
+from .titanic_pipeline import DATA_DIR
+
+MSTZ_TITANIC_DATASET = "mstz/titanic"
+MSTZ_TITANIC_PARQUET_PATH = DATA_DIR / "mstz_titanic.parquet"
+
+# Compact dtypes: smaller frames and shorter df.info()/df.head() output in agent prompts
+MSTZ_TITANIC_DTYPES = {
+    "passenger_class": "int8",
+    "embarked": "category",
+    "is_male": "bool",
+    "sibsp": "int8",
+    "parch": "int8",
+    "has_survived": "bool",
+    "age": "float32",
+    "fare": "float32",
+}
+
+
+def load_mstz_titanic(columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """Load the local copy of the mstz/titanic dataset.
+
+    Columns are converted to the compact dtypes in MSTZ_TITANIC_DTYPES.
+
+    Args:
+        columns: Columns to read; other columns are never decoded from the file.
+            All columns are read by default.
+
+    Returns:
+        The dataset as a DataFrame
+
+    Raises:
+        FileNotFoundError: If the dataset has not been cached yet
+    """
+    if not MSTZ_TITANIC_PARQUET_PATH.exists():
+        raise FileNotFoundError(
+            f"{MSTZ_TITANIC_PARQUET_PATH} not found; run `cache-titanic` (scripts/cache_titanic.py) once to create it"
+        )
+    df = pd.read_parquet(MSTZ_TITANIC_PARQUET_PATH, columns=columns)
+    return df.astype({column: dtype for column, dtype in MSTZ_TITANIC_DTYPES.items() if column in df.columns})
@@ -0,0 +1,26 @@
+#!/usr/bin/env python3
+"""Script to cache the mstz/titanic dataset locally.
+
+Downloads the dataset from Hugging Face once and writes it as Parquet to
+data_sources/mstz_titanic.parquet, where the diagnostics and tools read it.
+This is the only place that needs the ``datasets`` package.
+"""
+
+from datasets import load_dataset
+
+from data_pipeline.mstz_titanic import MSTZ_TITANIC_DATASET, MSTZ_TITANIC_PARQUET_PATH
+
+
+def main():
+    """Main entry point for the script."""
+    print(f"Downloading {MSTZ_TITANIC_DATASET} from Hugging Face...")
+    dataset = load_dataset(MSTZ_TITANIC_DATASET)["train"]
+
+    # Written straight from the Arrow table; no pandas copy is made
+    MSTZ_TITANIC_PARQUET_PATH.parent.mkdir(parents=True, exist_ok=True)
+    dataset.to_parquet(MSTZ_TITANIC_PARQUET_PATH, compression="zstd")
+    print(f"Wrote {len(dataset)} rows to {MSTZ_TITANIC_PARQUET_PATH}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,51 +3,161 @@
 This script provides a command-line interface for analyzing the Titanic dataset
 using the project's data analysis tools. It focuses specifically on data analysis
 capabilities and does not handle general queries about the Titanic.
+
+Usage:
+    titanic-data-analyst-cli [question]
+    titanic-data-analyst-cli --batch < questions.txt   (one question per line)
 """
 
+import asyncio
+import json
+import re
 import sys
-from typing import List, Optional
-from dotenv import load_dotenv
-from langchain_google_genai import ChatGoogleGenerativeAI
+from typing import Any, Dict, List, Optional
 
-from tools.titanic_agent import create_titanic_agent, record_analysis
+from data_pipeline.titanic_pipeline import get_titanic_data
+from tools import fast_paths
 from tools.knowledge import knowledge_base
 from config import config
 from utils.logger import setup_logger
+from utils.semantic_cache import CachedResponse, SemanticCache
 
 # Set up project-wide logger
 logger = setup_logger(name="titanic_data_analyst_cli", log_file="logs/titanic_data_analyst_cli.log")
 
+# Ceiling on model->tool->model turns and wall time per question
+AGENT_MAX_ITERATIONS = 4
+AGENT_MAX_EXECUTION_TIME = 30.0
+
+# Final answer AgentExecutor returns when it stops at one of the limits above
+AGENT_STOPPED_OUTPUT = "Agent stopped due to iteration limit or time limit."
+
+# Questions packed into one agent request in batch mode
+BATCH_SIZE = 4
+
+BATCH_PROMPT = """Answer each of the following {count} questions about the dataset.
+Use the tool as needed, then give as your final answer only a JSON array of {count} strings:
+the answers, in the order of the questions.
+
+{questions}"""
+
+# Markdown code fence the model may put around the JSON array
+_CODE_FENCE_RE = re.compile(r"^```(?:json)?\s*|\s*```$")
+
+
+async def stream_analysis(agent: Any, question: str) -> str:
+    """Run the agent, printing the model's output as it is generated.
+
+    Args:
+        agent: The Titanic analysis agent
+        question: The question to analyze
+
+    Returns:
+        The agent's final answer
+    """
+    result = ""
+    async for event in agent.astream_events({"input": question}, version="v2"):
+        if event["event"] == "on_chat_model_stream":
+            content = event["data"]["chunk"].content
+            if isinstance(content, str):
+                sys.stdout.write(content)
+                sys.stdout.flush()
+        elif event["event"] == "on_chain_end" and not event["parent_ids"]:
+            # End of the agent run itself (not of one of its steps)
+            result = event["data"]["output"]["output"]
+    if result == AGENT_STOPPED_OUTPUT:
+        logger.warning(
+            f"Agent hit its limit ({AGENT_MAX_ITERATIONS} iterations / {AGENT_MAX_EXECUTION_TIME}s) for query: {question}"
+        )
+    return result
+
+
+def parse_batch_answers(output: str, count: int) -> Optional[List[str]]:
+    """Parse the agent's answer to a batch of questions.
+
+    Args:
+        output: The agent's final answer
+        count: Number of questions in the batch
+
+    Returns:
+        One answer per question, or None if the output is not a JSON array of that length
+    """
+    try:
+        answers = json.loads(_CODE_FENCE_RE.sub("", output.strip()))
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(answers, list) or len(answers) != count:
+        return None
+    return [str(answer) for answer in answers]
+
+
+async def analyze_batch(agent: Any, questions: List[str]) -> List[str]:
+    """Answer several questions with one agent request.
+
+    The questions are numbered in a single prompt and the agent answers with a
+    JSON array. If that answer cannot be parsed, the questions are asked one at a time.
+
+    Args:
+        agent: The Titanic analysis agent
+        questions: The questions to analyze
+
+    Returns:
+        One answer per question, in order
+    """
+    if len(questions) > 1:
+        numbered = "\n".join(f"{i}. {question}" for i, question in enumerate(questions, 1))
+        prompt = BATCH_PROMPT.format(count=len(questions), questions=numbered)
+        answers = parse_batch_answers((await agent.ainvoke({"input": prompt}))["output"], len(questions))
+        if answers is not None:
+            return answers
+        logger.warning(f"Could not parse the batch answer; asking {len(questions)} questions one at a time")
 
-def create_model() -> ChatGoogleGenerativeAI:
-    """Create and configure the language model."""
-    return ChatGoogleGenerativeAI(
-        model=config.model.name,
-        google_api_key=config.google_api_key,
+    return [(await agent.ainvoke({"input": question}))["output"] for question in questions]
+
+
+async def load_answer_cache() -> SemanticCache:
+    """Create an answer cache seeded with the past analyses from the knowledge base.
+
+    The knowledge base is the persistent store: every analysis is recorded there,
+    so a paraphrase of an earlier question can be answered without the agent. The
+    question embeddings saved with the knowledge base seed the semantic tier, so
+    past questions are not embedded again on every run.
+
+    Returns:
+        The seeded cache
+    """
+    cache = SemanticCache(
+        model_name=config.model.name,
         temperature=config.model.temperature,
-        max_tokens=config.model.max_tokens,
-        top_p=config.model.top_p,
-        top_k=config.model.top_k,
-        convert_system_message_to_human=True,
+        embedding_model=knowledge_base.embedding_model,
     )
+    # Without an embedding model the cache only matches questions exactly
+    for step, embedding in await asyncio.to_thread(knowledge_base.embedded_analyses):
+        # Answers recorded when the agent stopped at its limits are not answers
+        if step.result == AGENT_STOPPED_OUTPUT:
+            continue
+        await cache.put(step.question, CachedResponse(answer=step.result), embedding=embedding)
+    return cache
 
 
-def main(args: Optional[List[str]] = None) -> None:
-    """Main function to run the Titanic data analysis CLI.
+async def amain(args: Optional[List[str]] = None) -> None:
+    """Run the Titanic data analysis CLI.
+
+    Common questions (see tools.fast_paths) are answered with a direct pandas
+    query, and questions similar to a past analysis from the knowledge base;
+    otherwise the agent call and the lookup of similar past analyses run
+    concurrently, and the new analysis is recorded after the result is printed.
 
     Args:
         args: Optional list of command line arguments. If not provided, sys.argv[1:] is used.
     """
     try:
-        # Load environment variables
-        load_dotenv()
-
         if args is None:
             args = sys.argv[1:]
 
-        # Create model and agent
-        model = create_model()
-        agent = create_titanic_agent(model)
+        if args[:1] == ["--batch"]:
+            await amain_batch([line.strip() for line in sys.stdin if line.strip()])
+            return
 
         # Get question from user if not provided
         if not args:
@@ -61,36 +171,154 @@ def main(args: Optional[List[str]] = None) -> None:
         else:
             question = " ".join(args)
 
-        # Run the analysis
         logger.info(f"Processing query: {question}")
-        print("\nAnalyzing...")
-        result = agent.run(question)
+        fast_path = fast_paths.match(question)
+        if fast_path is not None:
+            logger.info(f"Answering with a direct pandas query (fast_path=True): {question}")
+            print("\nResult:")
+            print(fast_path(get_titanic_data()))
+            return
 
-        # Record the analysis
-        record_analysis(
-            question=question,
-            approach="pandas_analysis",
-            code=result,  # Note: This is simplified, in practice we'd want to extract the actual code used
-            result=result,
-        )
+        # Answer from a past analysis if the question (or a paraphrase) was asked before
+        cache = await load_answer_cache()
+        cached = await cache.get(question)
+        if cached is not None:
+            logger.info(f"Answering from a past analysis (cache_hit=True): {question}")
+            result = cached.answer
+            similar = knowledge_base.get_similar_analyses(question)
+        else:
+            # Load LangChain and the Gemini client, and create model and agent, only
+            # when the question has to be analyzed; the agent only sees the rows the
+            # question is scoped to
+            from tools.llm import get_model as create_model
+            from tools.titanic_agent import create_titanic_agent, record_analysis, route_question
+
+            model = create_model()
+            agent = create_titanic_agent(
+                model,
+                filters=route_question(question),
+                max_iterations=AGENT_MAX_ITERATIONS,
+                max_execution_time=AGENT_MAX_EXECUTION_TIME,
+            )
+
+            # Run the analysis
+            print("\nAnalyzing...")
+            result, similar = await asyncio.gather(
+                stream_analysis(agent, question),
+                asyncio.to_thread(knowledge_base.get_similar_analyses, question),
+            )
 
         # Print result
         print("\nResult:")
         print(result)
 
         # Show similar past analyses
-        similar = knowledge_base.get_similar_analyses(question)
         if similar:
             print("\nSimilar past analyses:")
             for analysis in similar:
                 print(f"\nQuestion: {analysis.question}")
                 print(f"Result: {analysis.result}")
 
+        # Record a new analysis only after all output is shown. Without an embedding
+        # model the similar analyses above are the live history list that recording
+        # appends to, and the write is awaited so it completes before the CLI exits.
+        # An answer cut off at the agent's limits is not recorded, so it is never
+        # served as a past analysis.
+        if cached is None and result != AGENT_STOPPED_OUTPUT:
+            sys.stdout.flush()
+            await asyncio.to_thread(
+                record_analysis,
+                question=question,
+                approach="pandas_analysis",
+                code=result,  # Note: This is simplified, in practice we'd want to extract the actual code used
+                result=result,
+            )
+
     except Exception as e:
         logger.error(f"Error in Titanic analysis: {str(e)}", exc_info=True)
         print(f"\nError: {str(e)}")
         sys.exit(1)
 
 
+async def amain_batch(questions: List[str]) -> None:
+    """Answer a list of questions, BATCH_SIZE questions per agent request.
+
+    Common questions are answered with a direct pandas query and questions similar
+    to a past analysis from the knowledge base; the others are sent to the agent in
+    batches, and every new analysis is recorded.
+
+    Args:
+        questions: The questions to analyze
+    """
+    logger.info(f"Processing {len(questions)} queries in batch mode")
+    matched = {question: fast_paths.match(question) for question in questions}
+    direct = {question: fast_path for question, fast_path in matched.items() if fast_path is not None}
+    results: Dict[str, str] = {}
+    if direct:
+        df = get_titanic_data()
+        results = {question: fast_path(df) for question, fast_path in direct.items()}
+        logger.info(f"Answering {len(results)} of {len(questions)} queries with direct pandas queries (fast_path=True)")
+
+    remaining = [question for question in questions if question not in results]
+    cache = await load_answer_cache()
+    cached = await asyncio.gather(*(cache.get(question) for question in remaining))
+    results.update((question, hit.answer) for question, hit in zip(remaining, cached) if hit is not None)
+    pending = [question for question in remaining if question not in results]
+    logger.info(f"Answering {len(remaining) - len(pending)} of {len(questions)} queries from past analyses (cache_hit=True)")
+
+    if pending:
+        # LangChain and the Gemini client are only loaded when the agent is needed
+        from tools.llm import get_model as create_model
+        from tools.titanic_agent import create_titanic_agent, record_analysis
+
+        # A batch gets the per-question limits once for each of its questions
+        agent = create_titanic_agent(
+            create_model(),
+            max_iterations=AGENT_MAX_ITERATIONS * BATCH_SIZE,
+            max_execution_time=AGENT_MAX_EXECUTION_TIME * BATCH_SIZE,
+        )
+        for start in range(0, len(pending), BATCH_SIZE):
+            batch = pending[start : start + BATCH_SIZE]
+            print(f"\nAnalyzing questions {start + 1}-{start + len(batch)} of {len(pending)}...")
+            results.update(zip(batch, await analyze_batch(agent, batch)))
+
+    for question in questions:
+        print(f"\nQuestion: {question}")
+        print(f"Result: {results[question]}")
+
+    # Record the new analyses after all output is shown; answers cut off at the
+    # agent's limits are not recorded
+    sys.stdout.flush()
+    for question in pending:
+        if results[question] == AGENT_STOPPED_OUTPUT:
+            logger.warning(f"Agent hit its limit, not recording the answer for query: {question}")
+            continue
+        await asyncio.to_thread(
+            record_analysis,
+            question=question,
+            approach="pandas_analysis",
+            code=results[question],  # Note: This is simplified, in practice we'd want to extract the actual code used
+            result=results[question],
+        )
+
+
+def main_batch(questions: List[str]) -> None:
+    """Answer a list of questions with the Titanic data analysis agent.
+
+    Args:
+        questions: The questions to analyze
+    """
+    asyncio.run(amain_batch(questions))
+
+
+def main(args: Optional[List[str]] = None) -> None:
+    """Main function to run the Titanic data analysis CLI.
+
+    Args:
+        args: Optional list of command line arguments. If not provided, sys.argv[1:] is used.
+    """
+    asyncio.run(amain(args))
+
+
 if __name__ == "__main__":
     main()
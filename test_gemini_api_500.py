@@ -15,17 +15,18 @@ The script will:
 5. Test with full Titanic agent configuration
 """
 
-import os
 import sys
 import logging
 import argparse
+import asyncio
 import warnings
+from functools import lru_cache
 from typing import Optional
-from dotenv import load_dotenv
 import pandas as pd
-from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_experimental.agents.agent_toolkits import create_pandas_dataframe_agent
-from config import config
+from data_pipeline.mstz_titanic import load_mstz_titanic
+from tools.llm import get_model as create_model
+from tools.titanic_prompts import MSTZ_TITANIC_PREFIX, MSTZ_TITANIC_PRIVACY_PREFIX
 
 # Suppress deprecation warnings
 warnings.filterwarnings("ignore", message="Convert_system_message_to_human will be deprecated!")
@@ -38,29 +39,26 @@ logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(level
 logger = logging.getLogger(__name__)
 
 
-def get_api_key() -> str:
-    """Get the Google API key from environment variables."""
-    api_key = os.getenv("GOOGLE_API_KEY")
-    if not api_key:
-        raise ValueError("GOOGLE_API_KEY environment variable not set")
-    return api_key
-
-
-def create_model(
-    temperature: Optional[float] = None,
-    max_tokens: Optional[int] = None,
-    top_p: Optional[float] = None,
-    top_k: Optional[int] = None,
-) -> ChatGoogleGenerativeAI:
-    """Create and configure the language model with optional overrides."""
-    return ChatGoogleGenerativeAI(
-        model=config.model.name,
-        google_api_key=get_api_key(),
-        temperature=temperature or config.model.temperature,
-        max_tokens=max_tokens or config.model.max_tokens,
-        top_p=top_p or config.model.top_p,
-        top_k=top_k or config.model.top_k,
-        convert_system_message_to_human=True,
+@lru_cache(maxsize=1)
+def _titanic_df() -> pd.DataFrame:
+    """Load the local mstz/titanic dataset once (cached by scripts/cache_titanic.py)."""
+    return load_mstz_titanic()
+
+
+@lru_cache(maxsize=None)
+def _agent(prefix: Optional[str] = None, max_tokens: Optional[int] = None, handle_parsing_errors: bool = False):
+    """Create a pandas agent over the Titanic dataset once per configuration.
+
+    The agent (prompt, tool binding and output parsing) is built once and reused
+    by every test with the same configuration. It stays a full pandas agent
+    rather than a plain prompt | model | parser chain, because the tool-calling
+    path is what these diagnostics exercise.
+    """
+    kwargs = {"prefix": prefix} if prefix is not None else {}
+    if handle_parsing_errors:
+        kwargs["handle_parsing_errors"] = True
+    return create_pandas_dataframe_agent(
+        create_model(max_tokens=max_tokens), _titanic_df(), verbose=True, allow_dangerous_code=True, **kwargs
     )
 
 
@@ -97,8 +95,8 @@ def test_03_minimal_agent() -> None:
         model = create_model()
         df = pd.DataFrame({"A": [1, 2, 3], "B": ["a", "b", "c"]})
         agent = create_pandas_dataframe_agent(model, df, verbose=True, allow_dangerous_code=True)
-        response = agent.invoke("How many rows are there?")
-        logger.info(f"Response: {response}")
+        response = agent.invoke({"input": "How many rows are there?"})
+        logger.info(f"Response: {response['output']}")
         logger.info("Test 3 passed")
     except Exception as e:
         logger.error(f"Test 3 failed: {str(e)}", exc_info=True)
@@ -109,10 +107,7 @@ def test_04_titanic_dataframe() -> None:
     """Test 4: Titanic DataFrame without agent."""
     logger.info("Test 4: Titanic DataFrame")
     try:
-        from datasets import load_dataset
-
-        dataset = load_dataset("mstz/titanic")["train"]
-        df = dataset.to_pandas()
+        df = _titanic_df()
         logger.info(f"Titanic DataFrame created with {len(df)} rows")
         logger.info(f"Columns: {df.columns.tolist()}")
         logger.info("Test 4 passed")
@@ -125,14 +120,9 @@ def test_05_titanic_agent_minimal() -> None:
     """Test 5: Titanic agent with minimal configuration."""
     logger.info("Test 5: Titanic agent with minimal configuration")
     try:
-        from datasets import load_dataset
-
-        model = create_model()
-        dataset = load_dataset("mstz/titanic")["train"]
-        df = dataset.to_pandas()
-        agent = create_pandas_dataframe_agent(model, df, verbose=True, allow_dangerous_code=True)
-        response = agent.invoke("How many rows are there?")
-        logger.info(f"Response: {response}")
+        agent = _agent()
+        response = agent.invoke({"input": "How many rows are there?"})
+        logger.info(f"Response: {response['output']}")
         logger.info("Test 5 passed")
     except Exception as e:
         logger.error(f"Test 5 failed: {str(e)}", exc_info=True)
@@ -143,50 +133,9 @@ def test_06_titanic_agent_full() -> None:
     """Test 6: Titanic agent with full configuration."""
     logger.info("Test 6: Titanic agent with full configuration")
     try:
-        from datasets import load_dataset
-
-        model = create_model()
-        dataset = load_dataset("mstz/titanic")["train"]
-        df = dataset.to_pandas()
-        agent = create_pandas_dataframe_agent(
-            model,
-            df,
-            verbose=True,
-            allow_dangerous_code=True,
-            prefix="""You are a data analysis assistant. When analyzing the Titanic dataset:
-
-1. First, understand the data structure:
-   - Print and analyze the column names
-   - Understand what each column represents
-   - Note any data quality issues (missing values, etc.)
-
-2. Then, plan your analysis:
-   - Identify which columns are relevant to the question
-   - Determine what calculations or filters are needed
-   - Consider edge cases and data quality
-
-3. Finally, execute your analysis:
-   - Use ONLY the python_repl_ast tool
-   - Keep code simple and direct
-   - Always use print() for output
-   - Handle missing values with dropna()
-   - Format numbers with round(x, 2)
-
-The dataset has these columns:
-- has_survived: Whether the passenger survived (True/False)
-- passenger_class: Passenger class (1, 2, or 3)
-- name: Passenger name
-- is_male: Whether the passenger is male (True/False)
-- age: Passenger age
-- sibsp: Number of siblings/spouses aboard
-- parch: Number of parents/children aboard
-- ticket: Ticket number
-- fare: Passenger fare
-- cabin: Cabin number
-- embarked: Port of embarkation (C = Cherbourg, Q = Queenstown, S = Southampton)""",
-        )
-        response = agent.invoke("How many rows are there?")
-        logger.info(f"Response: {response}")
+        agent = _agent(MSTZ_TITANIC_PREFIX)
+        response = agent.invoke({"input": "How many rows are there?"})
+        logger.info(f"Response: {response['output']}")
         logger.info("Test 6 passed")
     except Exception as e:
         logger.error(f"Test 6 failed: {str(e)}", exc_info=True)
@@ -197,55 +146,9 @@ def test_07_titanic_spanish_names() -> None:
     """Test 7: Titanic agent with Spanish names query that caused 500 error."""
     logger.info("Test 7: Titanic agent with Spanish names query")
     try:
-        from datasets import load_dataset
-
-        model = create_model()
-        dataset = load_dataset("mstz/titanic")["train"]
-        df = dataset.to_pandas()
-        agent = create_pandas_dataframe_agent(
-            model,
-            df,
-            verbose=True,
-            allow_dangerous_code=True,
-            handle_parsing_errors=True,
-            prefix="""You are a data analysis assistant. When analyzing the Titanic dataset:
-
-1. First, understand the data structure:
-   - Print and analyze the column names
-   - Understand what each column represents
-   - Note any data quality issues (missing values, etc.)
-
-2. Then, plan your analysis:
-   - Identify which columns are relevant to the question
-   - Determine what calculations or filters are needed
-   - Consider edge cases and data quality
-
-3. Finally, execute your analysis:
-   - Use ONLY the python_repl_ast tool
-   - Keep code simple and direct
-   - Always use print() for output
-   - Handle missing values with dropna()
-   - Format numbers with round(x, 2)
-
-IMPORTANT: Name-based analysis is not available and will not be performed.
-This is a deliberate privacy and ethical consideration to prevent potential discrimination
-and protect passenger privacy. If asked about names, ethnicity, or nationality, politely
-decline and explain that such analysis is not available for privacy reasons.
-
-The dataset has these columns:
-- has_survived: Whether the passenger survived (True/False)
-- passenger_class: Passenger class (1, 2, or 3)
-- is_male: Whether the passenger is male (True/False)
-- age: Passenger age
-- sibsp: Number of siblings/spouses aboard
-- parch: Number of parents/children aboard
-- ticket: Ticket number
-- fare: Passenger fare
-- cabin: Cabin number
-- embarked: Port of embarkation (C = Cherbourg, Q = Queenstown, S = Southampton)""",
-        )
-        response = agent.invoke("How many last names of the passengers sounded spanish?")
-        logger.info(f"Response: {response}")
+        agent = _agent(MSTZ_TITANIC_PRIVACY_PREFIX, handle_parsing_errors=True)
+        response = agent.invoke({"input": "How many last names of the passengers sounded spanish?"})
+        logger.info(f"Response: {response['output']}")
         logger.info("Test 7 passed")
     except Exception as e:
         logger.error(f"Test 7 failed: {str(e)}", exc_info=True)
@@ -256,23 +159,19 @@ def test_08_model_parameters() -> None:
     """Test 8: Different model parameter combinations."""
     logger.info("Test 8: Testing different model parameters")
     try:
-        # Test with minimal tokens
-        logger.info("Testing with minimal tokens (100)")
-        model = create_model(max_tokens=100)
-        response = model.invoke("Say hello")
-        logger.info(f"Response: {response}")
+        # Model variants: minimal tokens, maximum tokens, and a different temperature
+        variants = [
+            ("minimal tokens (100)", create_model(max_tokens=100)),
+            ("maximum tokens (8192)", create_model(max_tokens=8192)),
+            ("temperature 0.0", create_model(temperature=0.0)),
+        ]
 
-        # Test with maximum tokens
-        logger.info("Testing with maximum tokens (8192)")
-        model = create_model(max_tokens=8192)
-        response = model.invoke("Say hello")
-        logger.info(f"Response: {response}")
+        # Send the requests concurrently
+        async def say_hello_all():
+            return await asyncio.gather(*(model.ainvoke("Say hello") for _, model in variants))
 
-        # Test with different temperature
-        logger.info("Testing with temperature 0.0")
-        model = create_model(temperature=0.0)
-        response = model.invoke("Say hello")
-        logger.info(f"Response: {response}")
+        for (label, _), response in zip(variants, asyncio.run(say_hello_all())):
+            logger.info(f"Response with {label}: {response}")
 
         logger.info("Test 8 passed")
     except Exception as e:
@@ -284,70 +183,23 @@ def test_09_cli_specific_query() -> None:
     """Test 9: Test with the specific CLI query that's failing."""
     logger.info("Test 9: Testing with CLI-specific query")
     try:
-        from datasets import load_dataset
-
-        model = create_model()
-        dataset = load_dataset("mstz/titanic")["train"]
-        df = dataset.to_pandas()
-        agent = create_pandas_dataframe_agent(
-            model,
-            df,
-            verbose=True,
-            allow_dangerous_code=True,
-            prefix="""You are a data analysis assistant. When analyzing the Titanic dataset:
-
-1. First, understand the data structure:
-   - Print and analyze the column names
-   - Understand what each column represents
-   - Note any data quality issues (missing values, etc.)
-
-2. Then, plan your analysis:
-   - Identify which columns are relevant to the question
-   - Determine what calculations or filters are needed
-   - Consider edge cases and data quality
-
-3. Finally, execute your analysis:
-   - Use ONLY the python_repl_ast tool
-   - Keep code simple and direct
-   - Always use print() for output
-   - Handle missing values with dropna()
-   - Format numbers with round(x, 2)
-
-The dataset has these columns:
-- has_survived: Whether the passenger survived (True/False)
-- passenger_class: Passenger class (1, 2, or 3)
-- name: Passenger name
-- is_male: Whether the passenger is male (True/False)
-- age: Passenger age
-- sibsp: Number of siblings/spouses aboard
-- parch: Number of parents/children aboard
-- ticket: Ticket number
-- fare: Passenger fare
-- cabin: Cabin number
-- embarked: Port of embarkation (C = Cherbourg, Q = Queenstown, S = Southampton)""",
-        )
+        agent = _agent(MSTZ_TITANIC_PREFIX)
 
         # Test with simpler queries first
         logger.info("Testing with simple query: How many females are in class 1?")
-        response = agent.invoke("How many females are in class 1?")
-        logger.info(f"Response: {response}")
-
-        # Break down the complex query into steps
-        logger.info("Testing step 1: Can you create a DataFrame of females in class 1?")
-        response = agent.invoke("Create a DataFrame containing only females in class 1 and print its shape.")
-        logger.info(f"Response: {response}")
-
-        logger.info("Testing step 2: Can you show the age column of females in class 1?")
-        response = agent.invoke("Print the age column for females in class 1.")
-        logger.info(f"Response: {response}")
-
-        logger.info("Testing step 3: Can you calculate the average age of females in class 1?")
-        response = agent.invoke("Calculate and print the average age of females in class 1.")
-        logger.info(f"Response: {response}")
-
-        logger.info("Testing step 4: Can you find the maximum age of females in class 1 who survived?")
-        response = agent.invoke("Find and print the maximum age among females in class 1 who survived.")
-        logger.info(f"Response: {response}")
+        response = agent.invoke({"input": "How many females are in class 1?"})
+        logger.info(f"Response: {response['output']}")
+
+        # Run all steps of the complex query in a single Python block (one tool call)
+        logger.info("Testing all steps in one script: females in class 1 (shape, ages, mean age, max age of survivors)")
+        response = agent.invoke(
+            {
+                "input": "Write and run a single Python block that: (1) filters df to females in class 1 and prints its "
+                "shape, (2) prints their age column, (3) prints their average age, and (4) prints the maximum age "
+                "among those who survived."
+            }
+        )
+        logger.info(f"Response: {response['output']}")
 
         logger.info("Test 9 passed")
     except Exception as e:
@@ -359,60 +211,31 @@ def test_09_cli_specific_query_with_retry() -> None:
     """Test 10: Test with CLI-specific query and retry logic."""
     logger.info("Test 10: Testing with CLI-specific query and retry logic")
     try:
-        from datasets import load_dataset
-
-        model = create_model()
-        dataset = load_dataset("mstz/titanic")["train"]
-        df = dataset.to_pandas()
-
-        # Store the prefix separately
-        agent_prefix = """You are a data analysis assistant. When analyzing the Titanic dataset:
-
-1. First, understand the data structure:
-   - Print and analyze the column names
-   - Understand what each column represents
-   - Note any data quality issues (missing values, etc.)
-
-2. Then, plan your analysis:
-   - Identify which columns are relevant to the question
-   - Determine what calculations or filters are needed
-   - Consider edge cases and data quality
-
-3. Finally, execute your analysis:
-   - Use ONLY the python_repl_ast tool
-   - Keep code simple and direct
-   - Always use print() for output
-   - Handle missing values with dropna()
-   - Format numbers with round(x, 2)
-
-The dataset has these columns:
-- has_survived: Whether the passenger survived (True/False)
-- passenger_class: Passenger class (1, 2, or 3)
-- name: Passenger name
-- is_male: Whether the passenger is male (True/False)
-- age: Passenger age
-- sibsp: Number of siblings/spouses aboard
-- parch: Number of parents/children aboard
-- ticket: Ticket number
-- fare: Passenger fare
-- cabin: Cabin number
-- embarked: Port of embarkation (C = Cherbourg, Q = Queenstown, S = Southampton)"""
-
         query = "What was the age of the oldest surviving female in class 1?"
         logger.info(f"Testing with query: {query}")
 
-        # Try with different model parameters
-        for max_tokens in [2048, 4096, 8192]:
+        # Try the different model parameters concurrently; the first success wins
+        async def try_max_tokens(max_tokens: int):
             logger.info(f"Trying with max_tokens={max_tokens}")
-            model = create_model(max_tokens=max_tokens)
-            agent = create_pandas_dataframe_agent(model, df, verbose=True, allow_dangerous_code=True, prefix=agent_prefix)
             try:
-                response = agent.invoke(query)
-                logger.info(f"Response with max_tokens={max_tokens}: {response}")
-                break
+                return max_tokens, await _agent(MSTZ_TITANIC_PREFIX, max_tokens=max_tokens).ainvoke({"input": query})
             except Exception as e:
                 logger.warning(f"Failed with max_tokens={max_tokens}: {str(e)}")
-                continue
+                return max_tokens, None
+
+        async def first_success():
+            tasks = [asyncio.create_task(try_max_tokens(max_tokens)) for max_tokens in [2048, 4096, 8192]]
+            try:
+                for next_done in asyncio.as_completed(tasks):
+                    max_tokens, response = await next_done
+                    if response is not None:
+                        logger.info(f"Response with max_tokens={max_tokens}: {response['output']}")
+                        return
+            finally:
+                for task in tasks:
+                    task.cancel()
+
+        asyncio.run(first_success())
 
         logger.info("Test 10 passed")
     except Exception as e:
@@ -429,9 +252,6 @@ def main() -> None:
     if args.verbose:
         logging.getLogger().setLevel(logging.DEBUG)
 
-    # Load environment variables
-    load_dotenv()
-
     # Run tests in sequence
     tests = [
         test_01_basic_model,
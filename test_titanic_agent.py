@@ -1,10 +1,47 @@
+import asyncio
+import logging
 import unittest
-from langchain_google_genai import ChatGoogleGenerativeAI
+from typing import Any, Dict
+import pytest
+from google.api_core.exceptions import ResourceExhausted
+from langchain_community.cache import SQLiteCache
+from langchain_core.globals import set_llm_cache
+from tenacity import before_sleep_log, retry, retry_if_exception_type, stop_after_delay, wait_exponential
+from tools.llm import get_model
 from tools.titanic_agent import create_titanic_agent
-from datasets import load_dataset
-from config import config
+from data_pipeline.mstz_titanic import load_mstz_titanic
+from data_pipeline.titanic_pipeline import DATA_DIR
 from utils.logger import logger
 
+# Every test here queries the Gemini API
+pytestmark = pytest.mark.llm
+
+# Model responses are cached across runs; delete the file to query the API again
+LLM_CACHE_PATH = DATA_DIR / "llm_cache.sqlite"
+
+# Rate-limited queries are retried with exponential backoff for at most this many seconds
+AGENT_RETRY_DEADLINE = 30
+
+# Agent queries per test; they are independent, so they are sent concurrently
+QUERIES = {
+    "basic_count": "Print the total number of rows in df",
+    "simple_mean": "Print the mean age after dropping NA values",
+    "simple_filter": "Print the number of rows where has_survived is True",
+    "simple_group": "Print the mean of has_survived for passenger_class 1",
+}
+
+
+@retry(
+    stop=stop_after_delay(AGENT_RETRY_DEADLINE),
+    wait=wait_exponential(multiplier=1, max=10),
+    retry=retry_if_exception_type(ResourceExhausted),
+    before_sleep=before_sleep_log(logger, logging.WARNING),
+    reraise=True,
+)
+async def _ainvoke(agent: Any, query: str) -> str:
+    """Ask the agent a query, retrying while the API is rate limited."""
+    return (await agent.ainvoke({"input": query}))["output"]
+
 
 class TestTitanicAgent(unittest.TestCase):
     @classmethod
@@ -12,33 +49,55 @@ class TestTitanicAgent(unittest.TestCase):
         """Set up test fixtures before running tests."""
         logger.info("Setting up test fixtures...")
 
-        # Load dataset first
-        dataset = load_dataset("mstz/titanic")["train"]
-        cls.df = dataset.to_pandas()
+        # Load dataset first (local copy written by scripts/cache_titanic.py); the agent
+        # gets its own data, so only the columns the ground truth needs are read
+        cls.df = load_mstz_titanic(columns=["age", "has_survived", "passenger_class"])
+
+        # Direct DataFrame operations to get the ground truth, computed once
+        cls.row_count = len(cls.df)
+        cls.mean_age = cls.df["age"].dropna().mean()
+        cls.survivor_count = int(cls.df["has_survived"].sum())
+        cls.survival_by_class = cls.df.groupby("passenger_class")["has_survived"].mean()
+
+        # Repeated runs send identical prompts (same queries, data and model settings),
+        # so they are answered from the cache instead of the API
+        set_llm_cache(SQLiteCache(database_path=str(LLM_CACHE_PATH)))
 
         # Initialize model with configuration settings
-        cls.model = ChatGoogleGenerativeAI(
-            model=config.model.name,
-            temperature=config.model.temperature,
-            max_tokens=config.model.max_tokens,
-            top_p=config.model.top_p,
-            top_k=config.model.top_k,
-            convert_system_message_to_human=True,
-        )
+        cls.model = get_model()
 
         # Create agent using the single source of truth
         cls.agent = create_titanic_agent(cls.model)
+
+        # Send all agent queries at once; each test checks its own response
+        cls.responses = asyncio.run(cls._ask_all())
         logger.info("Test fixtures setup complete")
 
+    @classmethod
+    def tearDownClass(cls):
+        """Remove the global LLM cache."""
+        set_llm_cache(None)
+
+    @classmethod
+    async def _ask_all(cls) -> Dict[str, Any]:
+        """Run all queries concurrently; a failed query yields its exception instead of a response."""
+        results = await asyncio.gather(*(_ainvoke(cls.agent, query) for query in QUERIES.values()), return_exceptions=True)
+        return dict(zip(QUERIES, results))
+
+    def _response(self, name: str) -> Any:
+        """Get the agent response for a query, raising the query's exception if it failed."""
+        response = self.responses[name]
+        if isinstance(response, Exception):
+            raise response
+        return response
+
     def test_01_basic_count(self):
         """Test the most basic query possible."""
         try:
-            # Direct DataFrame operation to get ground truth
-            actual_count = len(self.df)
-            logger.info(f"Actual row count: {actual_count}")
+            logger.info(f"Actual row count: {self.row_count}")
 
-            # Test the agent with a very simple query
-            result = self.agent.invoke("Print the total number of rows in df")
+            # Agent response to a very simple query
+            result = self._response("basic_count")
             logger.info(f"Agent response for row count: {result}")
 
             self.assertIsNotNone(result)
@@ -50,12 +109,10 @@ class TestTitanicAgent(unittest.TestCase):
     def test_02_simple_mean(self):
         """Test a simple mean calculation."""
         try:
-            # Direct DataFrame operation to get ground truth
-            actual_mean = self.df["age"].dropna().mean()
-            logger.info(f"Actual mean age: {actual_mean:.2f}")
+            logger.info(f"Actual mean age: {self.mean_age:.2f}")
 
-            # Test the agent with a direct query
-            result = self.agent.invoke("Print the mean age after dropping NA values")
+            # Agent response to a direct query
+            result = self._response("simple_mean")
             logger.info(f"Agent response for mean age: {result}")
 
             self.assertIsNotNone(result)
@@ -67,13 +124,10 @@ class TestTitanicAgent(unittest.TestCase):
     def test_03_simple_filter(self):
         """Test a simple filtering operation."""
         try:
-            # Direct DataFrame operation to get ground truth
-            survivors = self.df[self.df["has_survived"]]
-            actual_count = len(survivors)
-            logger.info(f"Actual survivor count: {actual_count}")
+            logger.info(f"Actual survivor count: {self.survivor_count}")
 
-            # Test the agent with a direct query
-            result = self.agent.invoke("Print the number of rows where has_survived is True")
+            # Agent response to a direct query
+            result = self._response("simple_filter")
             logger.info(f"Agent response for survivor count: {result}")
 
             self.assertIsNotNone(result)
@@ -85,12 +139,10 @@ class TestTitanicAgent(unittest.TestCase):
     def test_04_simple_group(self):
         """Test a simple grouping operation."""
         try:
-            # Direct DataFrame operation to get ground truth
-            survival_by_class = self.df.groupby("passenger_class")["has_survived"].mean()
-            logger.info(f"Actual survival rates by class:\n{survival_by_class}")
+            logger.info(f"Actual survival rates by class:\n{self.survival_by_class}")
 
-            # Test the agent with a direct query
-            result = self.agent.invoke("Print the mean of has_survived for passenger_class 1")
+            # Agent response to a direct query
+            result = self._response("simple_group")
             logger.info(f"Agent response for first class survival: {result}")
 
             self.assertIsNotNone(result)
@@ -11,22 +11,19 @@ def test_titanic_queries():
         print(f"\nTotal number of passengers: {len(df)}")
 
         # Test 2: Get survival statistics
-        survival_stats = df["Survived"].value_counts(normalize=True) * 100
+        counts = df["Survived"].value_counts()
+        percentages = counts / counts.sum() * 100
         print("\nSurvival statistics:")
-        for survived, percentage in survival_stats.items():
+        for survived, count in counts.items():
             status = "Survived" if survived else "Did not survive"
-            count = len(df[df["Survived"] == survived])
-            print(f"- {status}: {count} passengers ({percentage:.2f}%)")
+            print(f"- {status}: {count} passengers ({percentages[survived]:.2f}%)")
 
         # Test 3: Survival rate by passenger class
-        class_stats = df.groupby("Pclass").agg({"Survived": ["count", "sum", lambda x: (x.sum() / len(x)) * 100]}).round(2)
+        class_stats = df.groupby("Pclass")["Survived"].agg(total="count", survived="sum")
+        class_stats["rate"] = (class_stats["survived"] / class_stats["total"] * 100).round(2)
 
         print("\nSurvival rate by passenger class:")
-        for p_class in sorted(df["Pclass"].unique()):
-            stats = class_stats.loc[p_class]
-            total = int(stats[("Survived", "count")])
-            survived = int(stats[("Survived", "sum")])
-            rate = float(stats[("Survived", "<lambda_0>")])
+        for p_class, total, survived, rate in class_stats.itertuples():
             print(f"- Class {p_class}: {survived} out of {total} survived ({rate}%)")
 
     except Exception as e:
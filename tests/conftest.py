@@ -9,6 +9,22 @@ import pytest
 from pathlib import Path
 
 
+def pytest_addoption(parser):
+    """Add the --run-llm option."""
+    parser.addoption("--run-llm", action="store_true", default=False, help="run tests that require LLM API access")
+
+
+def pytest_collection_modifyitems(config, items):
+    """Skip llm-marked tests unless --run-llm is given or they are selected with -m."""
+    if config.getoption("--run-llm") or "llm" in config.getoption("-m"):
+        return
+
+    skip_llm = pytest.mark.skip(reason="requires LLM API access; use --run-llm or -m llm to run")
+    for item in items:
+        if "llm" in item.keywords:
+            item.add_marker(skip_llm)
+
+
 @pytest.fixture(scope="session")
 def project_root():
     """Return the project root directory."""
@@ -4,6 +4,8 @@ This module contains tests for the chat interface, message handling,
 and LLM interactions.
 """
 
+import asyncio
+
 import pytest
 
 
@@ -31,3 +33,89 @@ def test_chat_streaming():
 def test_chat_cli():
     """Test chat functionality from command line."""
     pass
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    "content, subqueries",
+    [
+        ("1. How many men survived?\n2. How many women survived?", ["How many men survived?", "How many women survived?"]),
+        ("- Median fare by class\n- Survival rate by sex", ["Median fare by class", "Survival rate by sex"]),
+        ("Why? Explain the survival gap between classes.", None),
+        ("Group by class; then compute the survival rate for women", None),
+        ("What was the average age?\nAnd how does it differ by class?", None),
+        ("1. Group the passengers by class\n2. Then compute the survival rate for women", None),
+        ("Answer these:\n1. How many men survived?\n2. How many women survived?", None),
+        ("1. How many passengers were aboard?", None),
+    ],
+)
+def test_plan_subqueries(content, subqueries):
+    """Test that only a list of independent questions is split; anything else stays whole."""
+    chat_app = pytest.importorskip("chat_app")
+    assert chat_app.plan_subqueries(content) == (subqueries or [content])
+
+
+class _StubUI:
+    """Stub for ChatUI that ignores thought-process updates."""
+
+    async def update_thought_process(self, thought):
+        pass
+
+
+def _stub_agent(chat_app, answers):
+    """Create a ChatAgent whose agent answers each question from a dict (raising exceptions it maps to)."""
+    from utils.semantic_cache import SemanticCache
+
+    agent = chat_app.ChatAgent.__new__(chat_app.ChatAgent)
+    agent.cache = SemanticCache(model_name="test-model", temperature=0.3)
+    agent.cache._semantic_enabled = False
+
+    async def invoke(content, thread_id, semaphore=None):
+        if isinstance(answers[content], Exception):
+            raise answers[content]
+        return answers[content]
+
+    async def process_response(response, ui):
+        return response, chat_app.ToolCalls(), chat_app.EMPTY_TOKEN_USAGE
+
+    agent._invoke = invoke
+    agent._process_response = process_response
+    return agent
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    "content, answers, cached",
+    [
+        ("How many men survived?", {"How many men survived?": "109"}, True),
+        ("How many men survived?", {"How many men survived?": "Agent stopped due to iteration limit or time limit."}, False),
+        (
+            "1. How many men survived?\n2. How many women survived?",
+            {"How many men survived?": "109", "How many women survived?": "233"},
+            True,
+        ),
+        (
+            "1. How many men survived?\n2. How many women survived?",
+            {"How many men survived?": "109", "How many women survived?": RuntimeError("rate limited")},
+            False,
+        ),
+        (
+            "1. How many men survived?\n2. How many women survived?",
+            {"How many men survived?": "109", "How many women survived?": "Agent stopped due to iteration limit or time limit."},
+            False,
+        ),
+    ],
+)
+def test_only_complete_answers_are_cached(content, answers, cached):
+    """Test that stopped runs and merged answers with a failed sub-question are not cached."""
+    chat_app = pytest.importorskip("chat_app")
+    agent = _stub_agent(chat_app, answers)
+    message = type("Message", (), {"content": content, "id": "message-1"})()
+
+    async def scenario():
+        final_answer, _, _ = await agent.process_message(message, _StubUI())
+        return final_answer, await agent.cache.get(content)
+
+    final_answer, hit = asyncio.run(scenario())
+    assert final_answer
+    assert (hit is not None and hit.answer == final_answer) is cached
@@ -0,0 +1,85 @@
+"""Tests for the direct pandas answers of common Titanic questions.
+
+This module contains tests for matching questions to fast-path templates and
+for the answers the handlers compute.
+"""
+
+import pandas as pd
+import pytest
+
+from tools import fast_paths
+
+
+@pytest.fixture
+def passengers():
+    """Return a small passenger frame with the pipeline's dtypes."""
+    return pd.DataFrame(
+        {
+            "Survived": [1, 0, 1, 0, 1],
+            "Pclass": [1, 1, 2, 3, 3],
+            "Sex": ["female", "male", "female", "male", "female"],
+            "Age": pd.Series([38.0, 54.0, 27.0, 22.0, 4.0], dtype="float32"),
+            "Fare": pd.Series([71.28, 51.86, 11.13, 7.25, 16.75], dtype="float32"),
+        }
+    )
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    "question",
+    [
+        "What is the average age of survivors by passenger class?",
+        "median fare per class",
+        "Survival rate by sex",
+        "overall survival rate",
+        "How many women survived?",
+        "how many passengers were aboard by port of embarkation",
+    ],
+)
+def test_match_hits(question):
+    """Test that template questions get a handler."""
+    assert fast_paths.match(question) is not None
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    "question",
+    [
+        "average age of survivors over 30",
+        "Which passenger paid the highest fare?",
+        "survival rate of children by class",
+        "Did women survive more often than men?",
+    ],
+)
+def test_match_misses(question):
+    """Test that questions with other conditions go to the agent."""
+    assert fast_paths.match(question) is None
+
+
+@pytest.mark.unit
+def test_aggregate_by_group(passengers):
+    """Test that a grouped aggregate prints two decimals, not float32 noise."""
+    answer = fast_paths.match("average fare by class")(passengers)
+    assert answer == "Average Fare of passengers by Pclass:\n  1: 61.57\n  2: 11.13\n  3: 12.0"
+
+
+@pytest.mark.unit
+def test_aggregate_of_subset(passengers):
+    """Test that an aggregate over a passenger subset only uses its rows."""
+    assert fast_paths.match("maximum age of survivors")(passengers) == "Maximum Age of survivors: 38.0"
+
+
+@pytest.mark.unit
+def test_survival_rate(passengers):
+    """Test that survival rates are given in percent."""
+    assert fast_paths.match("survival rate")(passengers) == "Survival rate (%) of passengers: 60.0"
+    answer = fast_paths.match("survival rate by sex")(passengers)
+    assert answer == "Survival rate (%) of passengers by Sex:\n  female: 100.0\n  male: 0.0"
+
+
+@pytest.mark.unit
+def test_count(passengers):
+    """Test that counts are whole numbers, optionally grouped."""
+    assert fast_paths.match("How many women survived?")(passengers) == "Number of women who survived: 3"
+    answer = fast_paths.match("how many passengers died by class")(passengers)
+    assert answer == "Number of passengers who died by Pclass:\n  1: 1\n  3: 1"
@@ -0,0 +1,111 @@
+"""Tests for the knowledge base.
+
+This module contains tests for storing insights and analysis steps as JSON
+Lines, converting knowledge saved in the old JSON format, and compacting.
+"""
+
+import json
+
+import numpy as np
+import pytest
+
+from tools.knowledge import AnalysisStep, KnowledgeBase
+
+
+def _step(question: str) -> AnalysisStep:
+    return AnalysisStep(
+        timestamp="2025-01-01T00:00:00",
+        question=question,
+        approach="pandas_analysis",
+        code="df.shape",
+        result=f"answer to: {question}",
+        insights=[],
+    )
+
+
+class _StubEncoder:
+    """Stub for KnowledgeBase._encode that embeds a question by its length and counts calls."""
+
+    def __init__(self):
+        self.encoded = []
+
+    def __call__(self, texts):
+        self.encoded.extend(texts)
+        return np.array([[len(text), 1.0] for text in texts], dtype=np.float32)
+
+
+def _knowledge_base(path, encoder):
+    knowledge = KnowledgeBase(path)
+    knowledge._encode = encoder
+    return knowledge
+
+
+@pytest.mark.unit
+def test_record_analysis_appends_lines(tmp_path):
+    """Test that each recorded analysis is one line, read back on load."""
+    knowledge = KnowledgeBase(tmp_path)
+    knowledge.record_analysis(_step("How many passengers?"))
+    knowledge.record_analysis(_step("How many women survived?"))
+
+    assert len(knowledge.analysis_file.read_text().splitlines()) == 2
+    reloaded = KnowledgeBase(tmp_path)
+    assert [step.question for step in reloaded.analysis_history] == ["How many passengers?", "How many women survived?"]
+
+
+@pytest.mark.unit
+def test_legacy_json_is_migrated(tmp_path):
+    """Test that knowledge saved as JSON arrays is converted to JSON Lines once."""
+    legacy = [vars(_step("How many passengers?")), vars(_step("Average fare by class"))]
+    (tmp_path / "analysis_history.json").write_text(json.dumps(legacy))
+
+    knowledge = KnowledgeBase(tmp_path)
+
+    assert [step.question for step in knowledge.analysis_history] == ["How many passengers?", "Average fare by class"]
+    assert knowledge.analysis_file.exists()
+    assert knowledge.insights_file.exists()
+    assert [json.loads(line)["question"] for line in knowledge.analysis_file.read_text().splitlines()] == [
+        "How many passengers?",
+        "Average fare by class",
+    ]
+
+
+@pytest.mark.unit
+def test_compact_rewrites_from_memory(tmp_path):
+    """Test that compact() replaces the files with the in-memory knowledge."""
+    knowledge = KnowledgeBase(tmp_path)
+    for question in ("How many passengers?", "How many men survived?", "How many women survived?"):
+        knowledge.record_analysis(_step(question))
+
+    del knowledge.analysis_history[1]
+    knowledge.compact()
+
+    assert not list(tmp_path.glob("*.part"))
+    reloaded = KnowledgeBase(tmp_path)
+    assert [step.question for step in reloaded.analysis_history] == ["How many passengers?", "How many women survived?"]
+
+
+@pytest.mark.unit
+def test_embeddings_follow_the_history(tmp_path):
+    """Test that stored embeddings are matched to the questions, not the row positions."""
+    questions = ["How many passengers?", "How many men survived?", "Average fare by passenger class"]
+    encoder = _StubEncoder()
+    knowledge = _knowledge_base(tmp_path, encoder)
+    for question in questions:
+        knowledge.record_analysis(_step(question))
+    knowledge.embedded_analyses()
+    assert encoder.encoded == questions
+
+    # Another process removes the first step and compacts the history
+    other = KnowledgeBase(tmp_path)
+    del other.analysis_history[0]
+    other.compact()
+
+    encoder = _StubEncoder()
+    reloaded = _knowledge_base(tmp_path, encoder)
+    pairs = reloaded.embedded_analyses()
+    assert [(step.question, embedding[0]) for step, embedding in pairs] == [(q, len(q)) for q in questions[1:]]
+    assert encoder.encoded == []
+
+    # The rewritten embeddings file now matches the history as is
+    assert _knowledge_base(tmp_path, encoder)._question_embeddings().shape == (2, 2)
+    assert encoder.encoded == []
@@ -0,0 +1,199 @@
+"""Tests for the agent response cache.
+
+No embedding model is downloaded: the exact-match tests disable the semantic
+tier, and the semantic tests use a stub embedder.
+"""
+
+import asyncio
+
+import numpy as np
+import pytest
+
+from utils.semantic_cache import CachedResponse, SemanticCache, VectorIndex, normalize_prompt, prompt_entities
+
+
+class _ConstantEmbedder:
+    """Stub embedder that maps every prompt to the same unit vector."""
+
+    async def embed(self, text: str) -> np.ndarray:
+        return np.full(4, 0.5, dtype=np.float32)
+
+
+def _exact_cache(**kwargs) -> SemanticCache:
+    cache = SemanticCache(model_name="test-model", temperature=0.3, **kwargs)
+    cache._semantic_enabled = False
+    return cache
+
+
+def _semantic_cache() -> SemanticCache:
+    # Every prompt is a perfect semantic match, so only the entity check decides
+    cache = SemanticCache(model_name="test-model", temperature=0.3)
+    cache._embedder = _ConstantEmbedder()
+    return cache
+
+
+def _semantic_lookup(stored: str, asked: str):
+    cache = _semantic_cache()
+
+    async def scenario():
+        await cache.put(stored, CachedResponse(answer=f"answer to: {stored}"))
+        return await cache.get(asked)
+
+    return asyncio.run(scenario())
+
+
+@pytest.mark.unit
+def test_normalize_prompt():
+    """Test that prompts are stripped, lowercased and whitespace-collapsed."""
+    assert normalize_prompt("  How many   passengers\nSURVIVED? ") == "how many passengers survived?"
+
+
+@pytest.mark.unit
+def test_exact_hit_after_put():
+    """Test that a stored answer is returned for an equivalent prompt."""
+    cache = _exact_cache()
+    response = CachedResponse(answer="342 passengers survived.", token_usage=(4, 6, 10))
+
+    async def scenario():
+        assert await cache.get("How many passengers survived?") is None
+        await cache.put("How many passengers survived?", response)
+        return await cache.get("  how many passengers   survived? ")
+
+    assert asyncio.run(scenario()) == response
+
+
+@pytest.mark.unit
+def test_lru_eviction():
+    """Test that the least recently used entry is evicted first."""
+    cache = _exact_cache(maxsize=2)
+
+    async def scenario():
+        await cache.put("a", CachedResponse(answer="A"))
+        await cache.put("b", CachedResponse(answer="B"))
+        await cache.get("a")
+        await cache.put("c", CachedResponse(answer="C"))
+        return [await cache.get(p) for p in ("a", "b", "c")]
+
+    a, b, c = asyncio.run(scenario())
+    assert a.answer == "A"
+    assert b is None
+    assert c.answer == "C"
+
+
+@pytest.mark.unit
+def test_prompt_entities():
+    """Test that subgroups and numbers are extracted from a prompt."""
+    entities = prompt_entities(normalize_prompt("Average fare of women in first class over 30?"))
+    assert entities == {"sex:female", "class:1", "30"}
+    assert prompt_entities("how many men survived?") == {"sex:male", "survived"}
+
+
+@pytest.mark.unit
+def test_semantic_hit_for_paraphrase():
+    """Test that a paraphrase about the same subgroup is answered from the cache."""
+    hit = _semantic_lookup("How many women survived?", "Number of women who survived")
+    assert hit.answer == "answer to: How many women survived?"
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    "stored, asked",
+    [
+        ("How many men survived?", "How many women survived?"),
+        ("Average fare in first class", "Average fare in third class"),
+        ("How many passengers survived?", "How many passengers died?"),
+        ("How many passengers were older than 30?", "How many passengers were older than 40?"),
+    ],
+)
+def test_semantic_miss_for_other_entities(stored, asked):
+    """Test that a close paraphrase about another subgroup or number is a miss."""
+    assert _semantic_lookup(stored, asked) is None
+
+
+@pytest.mark.unit
+def test_put_with_precomputed_embedding():
+    """Test that a precomputed embedding is indexed without embedding the prompt again."""
+
+    class _FailingEmbedder:
+        async def embed(self, text: str) -> np.ndarray:
+            raise AssertionError("prompt embedded again")
+
+    cache = SemanticCache(model_name="test-model", temperature=0.3)
+    cache._embedder = _FailingEmbedder()
+    embedding = np.full(4, 0.5, dtype=np.float32)
+
+    async def scenario():
+        await cache.put("How many women survived?", CachedResponse(answer="233"), embedding=embedding)
+        cache._embedder = _ConstantEmbedder()
+        return await cache.get("Number of women who survived")
+
+    assert len(cache._index) == 0
+    assert asyncio.run(scenario()).answer == "233"
+    assert len(cache._index) == 1
+
+
+def _unit(*components: float) -> np.ndarray:
+    vector = np.array(components, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+@pytest.mark.unit
+def test_evicted_paraphrase_does_not_hit():
+    """Test that an entry evicted from the exact tier is gone from the semantic tier too."""
+
+    class _TopicEmbedder:
+        """Stub embedder that puts prompts about women on one axis and others on another."""
+
+        async def embed(self, text: str) -> np.ndarray:
+            return _unit(1, 0) if "women" in text else _unit(0, 1)
+
+    cache = SemanticCache(model_name="test-model", temperature=0.3, maxsize=1)
+    cache._embedder = _TopicEmbedder()
+
+    async def scenario():
+        await cache.put("How many women survived?", CachedResponse(answer="233"))
+        assert (await cache.get("Number of women who survived")).answer == "233"
+        await cache.put("Average fare in first class", CachedResponse(answer="84.15"))
+        return await cache.get("Number of women who survived")
+
+    assert asyncio.run(scenario()) is None
+    assert len(cache._index) == 1
+    assert cache._index.search(_unit(1, 0))[1] != cache._key(normalize_prompt("How many women survived?"))
+
+
+@pytest.mark.unit
+def test_vector_index_remove():
+    """Test that removed vectors are never returned and their rows are compacted away."""
+    index = VectorIndex()
+    for i in range(8):
+        index.add(f"key-{i}", _unit(1, i / 10))
+    index.add("far", _unit(-1, 0))
+
+    index.remove("key-0")
+    assert index.search(_unit(1, 0))[1] == "key-1"
+    for i in range(1, 8):
+        index.remove(f"key-{i}")
+
+    assert len(index) == 1
+    assert len(index.keys) < 9
+    assert index.search(_unit(1, 0))[1] == "far"
+
+
+@pytest.mark.unit
+def test_ivf_recall_matches_flat_search():
+    """Test that past the IVF threshold, search finds the same neighbours as the flat int8 search."""
+    pytest.importorskip("faiss")
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(400, 32))
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    ivf = VectorIndex(nlist=4, nprobe=4, pq_m=8)
+    flat = VectorIndex(ivf_threshold=len(vectors) + 1)
+    for i, vector in enumerate(vectors.astype(np.float32)):
+        ivf.add(f"key-{i}", vector)
+        flat.add(f"key-{i}", vector)
+    assert ivf._index is not None and flat._index is None
+
+    queries = vectors[:100] + 0.05 * rng.normal(size=(100, 32))
+    queries = (queries / np.linalg.norm(queries, axis=1, keepdims=True)).astype(np.float32)
+    recall = np.mean([ivf.search(query)[1] == flat.search(query)[1] for query in queries])
+    assert recall >= 0.95
@@ -37,3 +37,40 @@ def test_titanic_cli():
 def test_database_operations():
     """Test database operations for Titanic data."""
     pass
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    "question, filters",
+    [
+        ("Who was the oldest surviving woman in first class?", (("Sex", "female"), ("Pclass", 1), ("Survived", 1))),
+        ("What was the median fare of men?", (("Sex", "male"),)),
+        ("How many men and women were aboard?", ()),
+        ("Compare the survival rate of men and women", ()),
+        ("What is the median age?", ()),
+        ("Were women more likely to survive than other passengers?", ()),
+        ("Did first-class passengers fare better than the rest?", ()),
+        ("How much older were survivors than average?", ()),
+    ],
+)
+def test_route_question(question, filters):
+    """Test that a question is scoped to the rows it names exactly one value for."""
+    titanic_agent = pytest.importorskip("tools.titanic_agent")
+    assert titanic_agent.route_question(question) == filters
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    "output, count, answers",
+    [
+        ('["891", "38.38%"]', 2, ["891", "38.38%"]),
+        ('```json\n["891", 342]\n```', 2, ["891", "342"]),
+        ('["891"]', 2, None),
+        ('{"answer": "891"}', 1, None),
+        ("There were 891 passengers.", 1, None),
+    ],
+)
+def test_parse_batch_answers(output, count, answers):
+    """Test that only a JSON array with one answer per question is accepted."""
+    cli = pytest.importorskip("scripts.titanic_data_analyst_cli")
+    assert cli.parse_batch_answers(output, count) == answers
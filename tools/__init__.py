@@ -1,3 +1,17 @@
-from .pandas_tools import create_pandas_agent
+"""Tools for Titanic dataset analysis.
+
+create_pandas_agent is imported on first use, so light modules such as
+tools.fast_paths and tools.knowledge load without LangChain and the Gemini client.
+"""
+
+from importlib import import_module
+from typing import Any
 
 __all__ = ["create_pandas_agent"]
+
+
+def __getattr__(name: str) -> Any:
+    """Import the package's public names from their modules on first access."""
+    if name == "create_pandas_agent":
+        return import_module(".pandas_tools", __name__).create_pandas_agent
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,182 @@
+"""Direct pandas answers for common Titanic questions.
+
+Questions such as "average age of survivors by passenger class" or "survival
+rate by sex" are answered by a single groupby, so they do not need the agent's
+ReAct loop. match() recognizes a small set of question templates and returns a
+handler that computes the answer on the pipeline's DataFrame; any other
+question returns None and goes to the agent.
+"""
+
+import re
+from typing import Callable, Dict, Optional, Tuple
+
+import pandas as pd
+
+FastPath = Callable[[pd.DataFrame], str]
+
+# Numeric columns a question can aggregate, by the words used for them
+_VALUE_COLUMNS = {
+    "Age": r"ages?",
+    "Fare": r"fares?|ticket prices?",
+    "SibSp": r"siblings(?: and |/)spouses|siblings",
+    "Parch": r"parents(?: and |/)children|parents",
+}
+
+# Columns a question can group by
+_GROUP_COLUMNS = {
+    "Pclass": r"(?:passenger )?class(?:es)?",
+    "Sex": r"sex|gender",
+    "Embarked": r"(?:port(?: of embarkation)?|embarkation(?: port)?)s?",
+}
+
+_AGGREGATES = {
+    "average": "mean",
+    "mean": "mean",
+    "median": "median",
+    "minimum": "min",
+    "min": "min",
+    "lowest": "min",
+    "maximum": "max",
+    "max": "max",
+    "highest": "max",
+    "total": "sum",
+}
+
+# Passenger subsets a question can be about: (column, value), or None for all rows
+_SUBSETS: Dict[str, Optional[Tuple[str, object]]] = {
+    "passengers": None,
+    "survivors": ("Survived", 1),
+    "non-survivors": ("Survived", 0),
+    "women": ("Sex", "female"),
+    "females": ("Sex", "female"),
+    "men": ("Sex", "male"),
+    "males": ("Sex", "male"),
+}
+
+
+def _alternatives(patterns: Dict[str, str]) -> str:
+    """Join a name -> pattern mapping into one regex alternation."""
+    return "|".join(f"(?:{pattern})" for pattern in patterns.values())
+
+
+_PREAMBLE = r"(?:(?:what is|what's|what are|show|give me|calculate) )?(?:the )?"
+_VALUE = rf"(?P<value>{_alternatives(_VALUE_COLUMNS)})"
+_GROUP = rf"(?:by|per|for each|in each|across) (?P<group>{_alternatives(_GROUP_COLUMNS)})"
+_SUBSET = rf"(?: (?:of|for|among)(?: the)? (?P<subset>{'|'.join(map(re.escape, _SUBSETS))}))?"
+_AGGREGATE = rf"(?P<aggregate>{'|'.join(_AGGREGATES)})"
+
+_AGGREGATE_RE = re.compile(rf"{_PREAMBLE}{_AGGREGATE} {_VALUE}{_SUBSET}(?: {_GROUP})?")
+_SURVIVAL_RATE_RE = re.compile(rf"{_PREAMBLE}(?:overall )?survival rates?{_SUBSET}(?: {_GROUP})?")
+_COUNT_RE = re.compile(
+    rf"how many (?P<subset>{'|'.join(map(re.escape, _SUBSETS))})(?: (?P<survived>survived|died))?"
+    rf"(?: (?:were there|were aboard|were on board))?(?: {_GROUP})?"
+)
+
+
+def _normalize(question: str) -> str:
+    """Lowercase a question and strip surrounding whitespace and punctuation."""
+    return " ".join(question.lower().split()).strip(" ?.!")
+
+
+def _column(patterns: Dict[str, str], text: Optional[str]) -> Optional[str]:
+    """Find the column whose pattern matches text."""
+    if text is None:
+        return None
+    return next(column for column, pattern in patterns.items() if re.fullmatch(pattern, text))
+
+
+def _subset(df: pd.DataFrame, subset: Optional[str]) -> pd.DataFrame:
+    """Select the rows of a passenger subset."""
+    condition = _SUBSETS.get(subset or "passengers")
+    if condition is None:
+        return df
+    column, value = condition
+    return df[df[column] == value]
+
+
+def _format(values: pd.Series, label: str) -> str:
+    """Format a grouped result as one line per group, rounded to two decimals."""
+    if pd.api.types.is_float_dtype(values):
+        # Age and Fare are float32; rounded float32 values still print as e.g. 71.27999877929688
+        values = values.astype("float64").round(2)
+    lines = [f"{label}:"]
+    lines.extend(f"  {group}: {value}" for group, value in values.items())
+    return "\n".join(lines)
+
+
+def _aggregate_path(aggregate: str, value: str, subset: Optional[str], group: Optional[str]) -> FastPath:
+    """Handler for "<aggregate> <value> [of <subset>] [by <group>]"."""
+    function = _AGGREGATES[aggregate]
+
+    def handler(df: pd.DataFrame) -> str:
+        rows = _subset(df, subset)
+        label = f"{aggregate.capitalize()} {value} of {subset or 'passengers'}"
+        if group is None:
+            return f"{label}: {round(float(rows[value].agg(function)), 2)}"
+        return _format(rows.groupby(group, observed=True)[value].agg(function), f"{label} by {group}")
+
+    return handler
+
+
+def _survival_rate_path(subset: Optional[str], group: Optional[str]) -> FastPath:
+    """Handler for "survival rate [of <subset>] [by <group>]", in percent."""
+
+    def handler(df: pd.DataFrame) -> str:
+        rows = _subset(df, subset)
+        label = f"Survival rate (%) of {subset or 'passengers'}"
+        if group is None:
+            return f"{label}: {round(float(rows['Survived'].mean()) * 100, 2)}"
+        return _format(rows.groupby(group, observed=True)["Survived"].mean() * 100, f"{label} by {group}")
+
+    return handler
+
+
+def _count_path(subset: Optional[str], survived: Optional[str], group: Optional[str]) -> FastPath:
+    """Handler for "how many <subset> [survived|died] [by <group>]"."""
+
+    def handler(df: pd.DataFrame) -> str:
+        rows = _subset(df, subset)
+        label = f"Number of {subset}"
+        if survived is not None:
+            rows = rows[rows["Survived"] == int(survived == "survived")]
+            label = f"{label} who {survived}"
+        if group is None:
+            return f"{label}: {len(rows)}"
+        return _format(rows.groupby(group, observed=True).size(), f"{label} by {group}")
+
+    return handler
+
+
+def match(question: str) -> Optional[FastPath]:
+    """Find a direct pandas handler for a question.
+
+    The whole question has to match one of the templates, so a question with any
+    further condition (e.g. "average age of survivors over 30") goes to the agent.
+
+    Args:
+        question: The question to answer
+
+    Returns:
+        A function computing the answer from the Titanic DataFrame, or None if the
+        question needs the agent
+    """
+    text = _normalize(question)
+
+    found = _AGGREGATE_RE.fullmatch(text)
+    if found:
+        return _aggregate_path(
+            found["aggregate"],
+            _column(_VALUE_COLUMNS, found["value"]),
+            found["subset"],
+            _column(_GROUP_COLUMNS, found["group"]),
+        )
+
+    found = _SURVIVAL_RATE_RE.fullmatch(text)
+    if found:
+        return _survival_rate_path(found["subset"], _column(_GROUP_COLUMNS, found["group"]))
+
+    found = _COUNT_RE.fullmatch(text)
+    if found:
+        return _count_path(found["subset"], found["survived"], _column(_GROUP_COLUMNS, found["group"]))
+
+    return None
@@ -1,9 +1,31 @@
 """Knowledge management for the Titanic dataset analysis."""
 
+import hashlib
 import json
 from dataclasses import dataclass, asdict
 from pathlib import Path
-from typing import List
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from utils.semantic_cache import DEFAULT_EMBEDDING_MODEL, load_encoder
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Fast JSON encoding and decoding of knowledge records (orjson ships with langsmith)
+_dumps = orjson.dumps if orjson else lambda obj: json.dumps(obj).encode()
+_loads = orjson.loads if orjson else json.loads
+
+# Number of past analyses returned by get_similar_analyses
+SIMILAR_ANALYSES_LIMIT = 5
 
 
 @dataclass
@@ -30,19 +52,67 @@ class AnalysisStep:
     insights: List[DataInsight]
 
 
+def _read_records(path: Path) -> Iterator[Dict[str, Any]]:
+    """Read the records of a JSON Lines file.
+
+    Args:
+        path: The file to read
+
+    Yields:
+        One record per non-empty line
+    """
+    with open(path, "rb") as f:
+        for line in f:
+            if line.strip():
+                yield _loads(line)
+
+
+def _question_key(question: str) -> str:
+    """Key of a question's embedding: the SHA-256 of the question text."""
+    return hashlib.sha256(question.encode("utf-8")).hexdigest()
+
+
+def _append_record(path: Path, record: Dict[str, Any]) -> None:
+    """Append a record to a JSON Lines file.
+
+    The line is written in a single call under an exclusive lock (where flock is
+    available), so appends from concurrent processes do not interleave.
+
+    Args:
+        path: The file to append to
+        record: The record to append
+    """
+    line = _dumps(record) + b"\n"
+    with open(path, "ab") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        f.write(line)
+
+
 class KnowledgeBase:
-    """Manages knowledge about the Titanic dataset."""
+    """Manages knowledge about the Titanic dataset.
+
+    Insights and analysis steps are stored as JSON Lines: recording one appends a
+    single line instead of rewriting the whole history.
+    """
 
-    def __init__(self, knowledge_dir: Path = Path("knowledge")):
+    def __init__(self, knowledge_dir: Path = Path("knowledge"), embedding_model: str = DEFAULT_EMBEDDING_MODEL):
         """Initialize the knowledge base.
 
         Args:
             knowledge_dir: Directory to store knowledge files
+            embedding_model: Sentence-transformer model used to compare questions
         """
         self.knowledge_dir = knowledge_dir
         self.knowledge_dir.mkdir(parents=True, exist_ok=True)
-        self.insights_file = knowledge_dir / "insights.json"
-        self.analysis_file = knowledge_dir / "analysis_history.json"
+        self.insights_file = knowledge_dir / "insights.jsonl"
+        self.analysis_file = knowledge_dir / "analysis_history.jsonl"
+        self.embeddings_file = knowledge_dir / "analysis_embeddings.npz"
+        self.embedding_model = embedding_model
+        # Question embeddings, one row per analysis step, and the question key of
+        # every row; loaded on first use
+        self._embeddings: Optional[np.ndarray] = None
+        self._embedding_keys: List[str] = []
         self._load_knowledge()
 
     def _load_knowledge(self) -> None:
@@ -51,22 +121,106 @@ class KnowledgeBase:
         self.analysis_history: List[AnalysisStep] = []
 
         if self.insights_file.exists():
-            with open(self.insights_file) as f:
-                data = json.load(f)
-                self.insights = [DataInsight(**item) for item in data]
+            self.insights = [DataInsight(**item) for item in _read_records(self.insights_file)]
 
         if self.analysis_file.exists():
-            with open(self.analysis_file) as f:
-                data = json.load(f)
-                self.analysis_history = [AnalysisStep(**item) for item in data]
+            self.analysis_history = [AnalysisStep(**item) for item in _read_records(self.analysis_file)]
+
+        # Knowledge saved before the JSON Lines format is converted once
+        legacy_insights = self.knowledge_dir / "insights.json"
+        legacy_analyses = self.knowledge_dir / "analysis_history.json"
+        if not (self.insights_file.exists() or self.analysis_file.exists()) and (
+            legacy_insights.exists() or legacy_analyses.exists()
+        ):
+            if legacy_insights.exists():
+                with open(legacy_insights) as f:
+                    self.insights = [DataInsight(**item) for item in json.load(f)]
+            if legacy_analyses.exists():
+                with open(legacy_analyses) as f:
+                    self.analysis_history = [AnalysisStep(**item) for item in json.load(f)]
+            self.compact()
+
+    def compact(self) -> None:
+        """Rewrite the knowledge files from memory, one record per line.
+
+        Each file is written to a temporary file first and then replaced, so a
+        failed rewrite never loses knowledge. The question embeddings are matched
+        to the rewritten history on their next use.
+        """
+        for path, items in ((self.insights_file, self.insights), (self.analysis_file, self.analysis_history)):
+            partial_path = path.with_suffix(".jsonl.part")
+            with open(partial_path, "wb") as f:
+                f.writelines(_dumps(asdict(item)) + b"\n" for item in items)
+            partial_path.replace(path)
+
+    def _encode(self, texts: List[str]) -> Optional[np.ndarray]:
+        """Embed texts with the shared sentence-transformer model.
+
+        Args:
+            texts: The texts to embed
+
+        Returns:
+            Unit-length float32 embeddings, one row per text, or None if no model is available
+        """
+        encoder = load_encoder(self.embedding_model)
+        if encoder is None:
+            return None
+        embeddings = encoder.encode(texts, batch_size=len(texts), normalize_embeddings=True, show_progress_bar=False)
+        return np.asarray(embeddings, dtype=np.float32)
+
+    def _question_embeddings(self) -> Optional[np.ndarray]:
+        """Get the embeddings of the recorded questions, one row per analysis step.
+
+        Every row in the embeddings file is stored with the hash of its question,
+        so rows are matched to the history by question rather than by position.
+        After compact(), an edit of the history or a write by another process,
+        rows of questions that are no longer recorded are dropped, questions
+        without a row are encoded, and the file is rewritten. Each question is
+        embedded only once.
+
+        Returns:
+            The embedding matrix, or None if no model is available
+        """
+        if self._embeddings is None and self.embeddings_file.exists():
+            with np.load(self.embeddings_file) as stored:
+                self._embeddings = stored["embeddings"]
+                self._embedding_keys = stored["keys"].tolist()
+
+        keys = [_question_key(step.question) for step in self.analysis_history]
+        if keys == self._embedding_keys:
+            return self._embeddings
+
+        rows = {} if self._embeddings is None else dict(zip(self._embedding_keys, self._embeddings))
+        missing = {key: step.question for key, step in zip(keys, self.analysis_history) if key not in rows}
+        if missing:
+            new = self._encode(list(missing.values()))
+            if new is None:
+                return None
+            rows.update(zip(missing, new))
+
+        self._embedding_keys = keys
+        if not keys:
+            self._embeddings = None
+            self.embeddings_file.unlink(missing_ok=True)
+            return None
+        self._embeddings = np.stack([rows[key] for key in keys])
+        partial_path = self.embeddings_file.with_suffix(".npz.part")
+        with open(partial_path, "wb") as f:
+            np.savez(f, embeddings=self._embeddings, keys=np.array(keys, dtype=str))
+        partial_path.replace(self.embeddings_file)
+        return self._embeddings
 
-    def _save_knowledge(self) -> None:
-        """Save knowledge to files."""
-        with open(self.insights_file, "w") as f:
-            json.dump([asdict(insight) for insight in self.insights], f, indent=2)
+    def embedded_analyses(self) -> List[Tuple[AnalysisStep, Optional[np.ndarray]]]:
+        """Get every recorded analysis step with the embedding of its question.
 
-        with open(self.analysis_file, "w") as f:
-            json.dump([asdict(step) for step in self.analysis_history], f, indent=2)
+        Returns:
+            (step, unit-length question embedding) pairs in recording order; the
+            embeddings are None if no model is available
+        """
+        embeddings = self._question_embeddings()
+        if embeddings is None:
+            return [(step, None) for step in self.analysis_history]
+        return list(zip(self.analysis_history, embeddings))
 
     def add_insight(self, insight: DataInsight) -> None:
         """Add a new insight to the knowledge base.
@@ -75,7 +229,7 @@ class KnowledgeBase:
             insight: The insight to add
         """
         self.insights.append(insight)
-        self._save_knowledge()
+        _append_record(self.insights_file, asdict(insight))
 
     def record_analysis(self, step: AnalysisStep) -> None:
         """Record an analysis step.
@@ -84,7 +238,10 @@ class KnowledgeBase:
             step: The analysis step to record
         """
         self.analysis_history.append(step)
-        self._save_knowledge()
+        _append_record(self.analysis_file, asdict(step))
+        if self._embeddings is not None:
+            # Keep the loaded embeddings in step; otherwise they are built on the next lookup
+            self._question_embeddings()
 
     def get_relevant_insights(self, question: str) -> List[DataInsight]:
         """Get insights relevant to a question.
@@ -98,17 +255,33 @@ class KnowledgeBase:
         # TODO: Implement semantic search for insights
         return self.insights
 
-    def get_similar_analyses(self, question: str) -> List[AnalysisStep]:
+    def get_similar_analyses(self, question: str, limit: int = SIMILAR_ANALYSES_LIMIT) -> List[AnalysisStep]:
         """Get similar past analyses.
 
+        Past questions are ranked by the cosine similarity of their embeddings to
+        the question. Without an embedding model the full history is returned.
+
         Args:
             question: The question to find similar analyses for
+            limit: Maximum number of analyses to return
 
         Returns:
-            List of similar analyses
+            List of similar analyses, most similar first
         """
-        # TODO: Implement semantic search for analyses
-        return self.analysis_history
+        if not self.analysis_history:
+            return []
+
+        embeddings = self._question_embeddings()
+        query = None if embeddings is None else self._encode([question])
+        if query is None:
+            return self.analysis_history
+
+        scores = embeddings @ query[0]
+        if len(scores) > limit:
+            top = np.argpartition(-scores, limit - 1)[:limit]
+        else:
+            top = np.arange(len(scores))
+        return [self.analysis_history[i] for i in top[np.argsort(-scores[top])]]
 
 
 # Create global knowledge base instance
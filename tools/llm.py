@@ -0,0 +1,54 @@
+"""Shared factory for the Gemini chat model.
+
+Every script creates its model here, so one client (and its connections) is
+shared per combination of model parameters within a process.
+"""
+
+from functools import lru_cache
+from typing import Optional
+
+from langchain_google_genai import ChatGoogleGenerativeAI
+
+from config import config
+
+
+def get_model(
+    temperature: Optional[float] = None,
+    max_tokens: Optional[int] = None,
+    top_p: Optional[float] = None,
+    top_k: Optional[int] = None,
+) -> ChatGoogleGenerativeAI:
+    """Get the language model, configured from the config with optional overrides.
+
+    Args:
+        temperature: Sampling temperature; defaults to config.model.temperature
+        max_tokens: Maximum output tokens; defaults to config.model.max_tokens
+        top_p: Nucleus sampling threshold; defaults to config.model.top_p
+        top_k: Top-k sampling limit; defaults to config.model.top_k
+
+    Returns:
+        The shared model for this combination of parameters
+
+    Raises:
+        MissingAPIKeyError: If GOOGLE_API_KEY is not set
+    """
+    return _model(
+        config.model.temperature if temperature is None else temperature,
+        config.model.max_tokens if max_tokens is None else max_tokens,
+        config.model.top_p if top_p is None else top_p,
+        config.model.top_k if top_k is None else top_k,
+    )
+
+
+@lru_cache(maxsize=8)
+def _model(temperature: float, max_tokens: int, top_p: float, top_k: int) -> ChatGoogleGenerativeAI:
+    """Create the language model for one combination of parameters."""
+    return ChatGoogleGenerativeAI(
+        model=config.model.name,
+        google_api_key=config.google_api_key,
+        temperature=temperature,
+        max_tokens=max_tokens,
+        top_p=top_p,
+        top_k=top_k,
+        convert_system_message_to_human=True,
+    )
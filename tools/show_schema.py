@@ -1,43 +1,50 @@
+import re
 import sys
-from data_pipeline.titanic_pipeline import get_sqlite_connection
+from functools import lru_cache
+from typing import Optional
+from data_pipeline.titanic_pipeline import TITANIC_DB_PATH, get_sqlite_connection
+
+
+# Header lines, and column lines "- <name>: <type>[, statistics or (details)]"
+_SCHEMA_LINE_RE = re.compile(
+    r"^(?:(?P<header>(?:Table|Columns):.*)|- (?P<name>[^:\n]*):(?P<type>[^:,(\n]*))",
+    re.MULTILINE,
+)
 
 
 def format_schema_description(schema_desc: str) -> str:
     """Format the schema description to show only column names and types."""
-    # Split into lines and add proper indentation
-    lines = schema_desc.split("\n")
-    formatted_lines = []
-
-    for line in lines:
-        if line.startswith("Table:"):
-            formatted_lines.append(line)
-        elif line.startswith("Columns:"):
-            formatted_lines.append(line)
-        elif line.startswith("- "):
-            # Extract just the column name and type
-            parts = line.split(":")
-            if len(parts) >= 2:
-                col_def = parts[0].strip("- ").strip()
-                # Get just the type from the first part before any statistics
-                col_type = parts[1].split(",")[0].strip()
-                # Remove any statistics that might be in parentheses
-                col_type = col_type.split("(")[0].strip()
-                formatted_lines.append(f"  - {col_def}: {col_type}")
-
+    # One scan over the description; statistics after the type are dropped
+    formatted_lines = [
+        match["header"] or f"  - {match['name'].strip('- ').strip()}: {match['type'].strip()}"
+        for match in _SCHEMA_LINE_RE.finditer(schema_desc)
+    ]
     return "\n".join(formatted_lines)
 
 
 def get_schema_description() -> str:
-    """Get the schema description from the SQLite database."""
+    """Get the schema description from the SQLite database.
+
+    The description is read once and reused until the database file changes.
+    """
+    try:
+        db_mtime = TITANIC_DB_PATH.stat().st_mtime_ns
+    except FileNotFoundError:
+        db_mtime = None  # get_sqlite_connection creates the database
+    return _cached_schema(db_mtime)
+
+
+@lru_cache(maxsize=1)
+def _cached_schema(db_mtime: Optional[int]) -> str:
+    """Read the schema description for one version (mtime) of the database."""
     conn = get_sqlite_connection()
     cursor = conn.cursor()
 
     # Get table info
     cursor.execute("PRAGMA table_info(titanic)")
-    columns = cursor.fetchall()
 
     schema_desc = "Table: titanic\nColumns:\n"
-    for col in columns:
+    for col in cursor:
         schema_desc += f"- {col[1]}: {col[2]}\n"
 
     conn.close()
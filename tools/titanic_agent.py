@@ -1,28 +1,155 @@
 """Titanic agent module - single source of truth for Titanic dataset analysis."""
 
-from typing import Any
+import re
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, List, Tuple
+import pandas as pd
 from langchain_google_genai import ChatGoogleGenerativeAI
+from langchain_core.tools import Tool
 from langchain_experimental.agents.agent_toolkits import create_pandas_dataframe_agent
 from data_pipeline.titanic_pipeline import get_titanic_data
 from tools.knowledge import knowledge_base, DataInsight, AnalysisStep
+from tools.titanic_prompts import (
+    ANALYSIS_GUIDELINES_TOOL,
+    DATA_PROFILE_TOOL,
+    TITANIC_AGENT_PREFIX,
+    TITANIC_ANALYSIS_GUIDELINES,
+    TITANIC_FILTERED_NOTE,
+)
 from datetime import datetime
 from utils.logger import logger
 
+# Row filters a question can be scoped to: (column, value, keyword pattern)
+_ROUTES = (
+    ("Sex", "female", re.compile(r"\b(?:females?|wom[ae]n|girls?)\b", re.IGNORECASE)),
+    ("Sex", "male", re.compile(r"\b(?:males?|m[ae]n|boys?)\b", re.IGNORECASE)),
+    ("Pclass", 1, re.compile(r"\b(?:first|1st)[- ]class\b|\bclass[- ]?1\b", re.IGNORECASE)),
+    ("Pclass", 2, re.compile(r"\b(?:second|2nd)[- ]class\b|\bclass[- ]?2\b", re.IGNORECASE)),
+    ("Pclass", 3, re.compile(r"\b(?:third|3rd)[- ]class\b|\bclass[- ]?3\b", re.IGNORECASE)),
+    ("Survived", 1, re.compile(r"\b(?:survivors?|surviving|who survived)\b", re.IGNORECASE)),
+    ("Survived", 0, re.compile(r"\b(?:died|perished|did not survive|non-survivors?)\b", re.IGNORECASE)),
+)
+
+# Questions that compare groups, contrast a group with the other passengers or the
+# average, or ask for a share of the passengers need all rows
+_COMPARATIVE_RE = re.compile(
+    r"\b(?:compared?|comparison|versus|vs|rates?|ratio|proportion|percent(?:age)?|share|fraction"
+    r"|distribution|each|per|by|between|across|overall"
+    r"|than|(?:more|less) likely|likelier|higher|lower|better|worse|rest|others?|average)\b",
+    re.IGNORECASE,
+)
+
+RowFilters = Tuple[Tuple[str, Any], ...]
+
+# The step-by-step guidelines are fetched on demand instead of sent with every call
+_guidelines_tool = Tool(
+    name=ANALYSIS_GUIDELINES_TOOL,
+    description="Returns step-by-step guidelines and column descriptions for analyzing the Titanic dataset. Input is ignored.",
+    func=lambda _: TITANIC_ANALYSIS_GUIDELINES,
+)
+
+# Agents built so far, by (model identity, filters, options); each entry keeps its
+# model alive so the id cannot be reused by another model while cached
+AGENT_CACHE_SIZE = 4
+_agents: "OrderedDict[Tuple[int, RowFilters, Tuple[Tuple[str, Any], ...]], Tuple[Any, Any]]" = OrderedDict()
+
+
+def route_question(question: str) -> RowFilters:
+    """Find the row filters a question is scoped to.
+
+    A column is filtered only when the question names exactly one of its values,
+    e.g. "oldest surviving woman in first class" gives Sex == "female",
+    Pclass == 1 and Survived == 1. Questions that compare or contrast (e.g.
+    "were women more likely to survive than other passengers") are never
+    filtered, since answering them needs the rows outside the group.
 
-def create_titanic_agent(model: ChatGoogleGenerativeAI) -> Any:
+    Args:
+        question: The question to route
+
+    Returns:
+        (column, value) pairs; empty when the agent needs the full dataset
+    """
+    if _COMPARATIVE_RE.search(question):
+        return ()
+
+    matches: Dict[str, List[Any]] = {}
+    for column, value, pattern in _ROUTES:
+        if pattern.search(question):
+            matches.setdefault(column, []).append(value)
+    return tuple((column, values[0]) for column, values in matches.items() if len(values) == 1)
+
+
+def create_titanic_agent(model: ChatGoogleGenerativeAI, filters: RowFilters = (), **agent_kwargs: Any) -> Any:
     """Create a pandas DataFrame agent for Titanic dataset analysis.
 
     This is the single source of truth for creating the Titanic analysis agent.
     All other modules should use this function to create the agent.
 
+    Agents are memoized per model instance, filters and options, so repeated
+    calls with the shared model from tools.llm.get_model reuse the agent
+    instead of rebuilding it. Use create_titanic_agent.cache_clear() to reset.
+
     Args:
         model: The language model to use for reasoning
+        filters: (column, value) pairs from route_question; the agent is bound to
+            the matching rows only, which keeps its prompts and code smaller
+        **agent_kwargs: Additional AgentExecutor options, e.g. max_iterations or
+            max_execution_time, passed on to create_pandas_dataframe_agent
 
     Returns:
         A pandas DataFrame agent configured for Titanic analysis
     """
+    key = (id(model), filters, tuple(sorted(agent_kwargs.items())))
+    if key in _agents:
+        _agents.move_to_end(key)
+        return _agents[key][1]
+
+    agent = _build_titanic_agent(model, filters, **agent_kwargs)
+    _agents[key] = (model, agent)
+    if len(_agents) > AGENT_CACHE_SIZE:
+        _agents.popitem(last=False)
+    return agent
+
+
+create_titanic_agent.cache_clear = _agents.clear
+
+
+def _data_profile_tool(df: pd.DataFrame) -> Tool:
+    """Create the tool returning the profile of the agent's DataFrame.
+
+    The profile is computed on the first call and returned as is afterwards.
+    """
+
+    @lru_cache(maxsize=1)
+    def profile() -> str:
+        return "\n\n".join(
+            [
+                f"Rows: {len(df)}",
+                f"Column types:\n{df.dtypes.to_string()}",
+                f"Missing values per column:\n{df.isnull().sum().to_string()}",
+                f"Summary statistics:\n{df.describe().round(2).to_string()}",
+            ]
+        )
+
+    return Tool(
+        name=DATA_PROFILE_TOOL,
+        description="Returns the row count, column types, missing values and summary statistics of df. Input is ignored.",
+        func=lambda _: profile(),
+    )
+
+
+def _build_titanic_agent(model: ChatGoogleGenerativeAI, filters: RowFilters, **agent_kwargs: Any) -> Any:
+    """Build the Titanic agent; see create_titanic_agent."""
     logger.info("Loading Titanic dataset from data pipeline")
     df = get_titanic_data()
+    prefix = TITANIC_AGENT_PREFIX
+
+    if filters:
+        conditions = " and ".join(f"{column} == {value!r}" for column, value in filters)
+        df = df.query(conditions)
+        prefix = f"{TITANIC_AGENT_PREFIX}\n\n{TITANIC_FILTERED_NOTE.format(conditions=conditions)}"
+        logger.info(f"Binding agent to {len(df)} rows where {conditions}")
 
     logger.info("Creating pandas DataFrame agent")
     agent = create_pandas_dataframe_agent(
@@ -31,43 +158,9 @@ def create_titanic_agent(model: ChatGoogleGenerativeAI) -> Any:
         verbose=True,
         handle_parsing_errors=True,
         allow_dangerous_code=True,  # Required for pandas agent to work
-        prefix="""You are a data analysis assistant. When analyzing the Titanic dataset:
-
-1. First, understand the data structure:
-   - Print and analyze the column names
-   - Understand what each column represents
-   - Note any data quality issues (missing values, etc.)
-   - Store insights about the data structure
-
-2. Then, plan your analysis:
-   - Identify which columns are relevant to the question
-   - Determine what calculations or filters are needed
-   - Consider edge cases and data quality
-   - Check for similar past analyses
-
-3. Finally, execute your analysis:
-   - Use ONLY the python_repl_ast tool
-   - Keep code simple and direct
-   - Always use print() for output
-   - Handle missing values with dropna()
-   - Format numbers with round(x, 2)
-
-IMPORTANT: Name-based analysis is not available and will not be performed.
-This is a deliberate privacy and ethical consideration to prevent potential discrimination
-and protect passenger privacy. If asked about names, ethnicity, or nationality, politely
-decline and explain that such analysis is not available for privacy reasons.
-
-The dataset has these columns:
-- Survived: Whether the passenger survived (1 = Yes, 0 = No)
-- Pclass: Passenger class (1, 2, or 3)
-- Sex: Passenger sex (male or female)
-- Age: Passenger age
-- SibSp: Number of siblings/spouses aboard
-- Parch: Number of parents/children aboard
-- Ticket: Ticket number
-- Fare: Passenger fare
-- Cabin: Cabin number
-- Embarked: Port of embarkation (C = Cherbourg, Q = Queenstown, S = Southampton)""",
+        prefix=prefix,
+        extra_tools=[_guidelines_tool, _data_profile_tool(df)],
+        **agent_kwargs,
     )
 
     return agent
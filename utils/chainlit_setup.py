@@ -0,0 +1,83 @@
+"""Environment and Chainlit setup shared by the notebook scripts.
+
+This module loads the project's .env file and configures the Chainlit
+workspace (directories and environment variables) before a notebook is run.
+Both steps are idempotent and memoized, so repeated calls within a process do
+no file system work.
+
+The following environment variables are used if set:
+- CHAINLIT_WORKSPACE_DIR: Base directory for Chainlit (defaults to project root)
+
+and the following are set:
+- CHAINLIT_WORKSPACE_DIR, CHAINLIT_TRANSLATIONS_PATH, CHAINLIT_CONFIG_PATH
+"""
+
+import functools
+import os
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+from utils.directory_utils import get_project_root
+
+
+@functools.lru_cache(maxsize=1)
+def load_environment() -> None:
+    """Load environment variables from .env file.
+
+    This function:
+    1. Looks for .env file in the project root
+    2. Loads variables if found
+    3. Provides feedback on the loading status
+    """
+    env_path = get_project_root() / ".env"
+    if env_path.exists():
+        load_dotenv(env_path)
+        print(f"Loaded environment from {env_path}")
+    else:
+        print("Warning: No .env file found, using default environment")
+
+
+@functools.lru_cache(maxsize=1)
+def setup_chainlit_environment() -> None:
+    """Configure Chainlit environment variables and ensure proper directory structure.
+
+    This function sets up the Chainlit environment with the following priority:
+    1. Use existing environment variables if set
+    2. Fall back to project root-based defaults if not set
+
+    The function ensures that:
+    - All necessary directories exist
+    - Environment variables are set with absolute paths
+    - Configuration is consistent across the project
+    """
+    # Resolve the workspace once; an explicit workspace directory takes precedence
+    workspace_dir = os.environ.get("CHAINLIT_WORKSPACE_DIR")
+    if workspace_dir:
+        workspace_root = Path(workspace_dir).resolve()
+        print(f"Using custom workspace directory: {workspace_root}")
+    else:
+        workspace_root = get_project_root()
+
+    chainlit_dir = workspace_root / ".chainlit"
+    translations_dir = chainlit_dir / "translations"
+    config_file = chainlit_dir / "config.toml"
+
+    # Ensure directories exist (translations lives inside the chainlit directory)
+    if not translations_dir.exists():
+        translations_dir.mkdir(parents=True, exist_ok=True)
+
+    # Set environment variables with absolute paths
+    os.environ["CHAINLIT_WORKSPACE_DIR"] = str(workspace_root)
+    os.environ["CHAINLIT_TRANSLATIONS_PATH"] = str(translations_dir)
+    os.environ["CHAINLIT_CONFIG_PATH"] = str(config_file)
+
+    # Copy config.toml from notebooks only if it doesn't exist in the root
+    # This is a one-time setup to ensure the root config exists
+    if not config_file.exists():
+        notebook_config = workspace_root / "notebooks/.chainlit/config.toml"
+        if notebook_config.exists():
+            # Plain content copy; the file's metadata does not matter for a TOML config
+            config_file.write_bytes(notebook_config.read_bytes())
+            print("Initialized root config.toml from notebooks directory")
+            print("Note: Future changes should be made to the root config.toml only")
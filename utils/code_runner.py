@@ -4,11 +4,18 @@ This module provides functions for safely executing Python code in a controlled
 with proper error handling and logging.
 """
 
+from functools import lru_cache
+from types import CodeType
 from typing import Any, Dict, Optional
-import traceback
 from utils.logger import logger
 
 
+@lru_cache(maxsize=256)
+def _compile(code: str) -> CodeType:
+    """Compile a code snippet; agents often run the same snippet again."""
+    return compile(code, "<CodeRunner>", "exec")
+
+
 class CodeRunner:
     """Handles execution of Python code in a controlled environment.
 
@@ -40,24 +47,26 @@ class CodeRunner:
             The string representation of the execution result
 
         Raises:
-            Exception: If code execution fails
+            Exception: Any exception raised by the code, re-raised unchanged
         """
         try:
-            logger.debug(f"Executing code: {code}")
+            # Lazy %-formatting: code and results are only formatted when DEBUG is enabled
+            logger.debug("Executing code: %s", code)
 
             # Execute the code
-            exec(code, self.globals_dict, self.locals_dict)
+            exec(_compile(code), self.globals_dict, self.locals_dict)
 
             # Get the result
             result = str(self.locals_dict.get("_", ""))
-            logger.debug(f"Code execution result: {result}")
+            logger.debug("Code execution result: %s", result)
 
             return result
 
-        except Exception as e:
-            error_msg = f"Error executing code: {str(e)}\n{traceback.format_exc()}"
-            logger.error(error_msg)
-            raise Exception(error_msg)
+        except Exception:
+            # The traceback is formatted by the log handler; the original exception and
+            # its traceback are re-raised unchanged
+            logger.exception("Error executing code: %s", code)
+            raise
 
     def update_globals(self, new_globals: Dict[str, Any]) -> None:
         """Update the global variables available to executed code.
@@ -66,7 +75,7 @@ class CodeRunner:
             new_globals: Dictionary of new global variables to add
         """
         self.globals_dict.update(new_globals)
-        logger.debug(f"Updated globals: {list(new_globals.keys())}")
+        logger.debug("Updated globals: %s", list(new_globals))
 
     def clear_locals(self) -> None:
         """Clear the local variables dictionary."""
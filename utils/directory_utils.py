@@ -4,16 +4,20 @@ This module provides functions for managing application directories and files,
 ensuring they exist and are properly configured for the application's needs.
 """
 
+import functools
+import os
 from pathlib import Path
 from typing import List, Optional
 import logging
 
 
+@functools.lru_cache(maxsize=1)
 def get_project_root() -> Path:
     """Get the absolute path to the project root directory.
 
     This function determines the project root by looking for the pyproject.toml file,
-    starting from the current directory and moving up until it's found.
+    starting from the current directory and moving up until it's found. The result
+    is cached, so the file system is only searched once per process.
 
     Returns:
         Path: Absolute path to the project root directory
@@ -62,8 +66,10 @@ def ensure_directories(base_dir: Optional[Path] = None, dirs: Optional[List[str]
     for dir_name in dirs:
         dir_path = base_dir / dir_name
         try:
-            dir_path.mkdir(parents=create_parents, exist_ok=True)
-            logger.debug(f"Ensured directory exists: {dir_path}")
+            # One stat for an existing directory; mkdir on it fails and stats it anyway
+            if not dir_path.is_dir():
+                dir_path.mkdir(parents=create_parents, exist_ok=True)
+            logger.debug("Ensured directory exists: %s", dir_path)
         except Exception as e:
             logger.error(f"Failed to create directory {dir_path}: {str(e)}")
             raise
@@ -87,18 +93,16 @@ def ensure_file(file_path: Path, create_parents: bool = True) -> None:
 
     try:
         # Ensure parent directory exists
-        if create_parents:
+        if create_parents and not file_path.parent.is_dir():
             file_path.parent.mkdir(parents=True, exist_ok=True)
 
-        # Create file if it doesn't exist
+        # Create file if it doesn't exist; an existing file is checked without opening it
         if not file_path.exists():
             file_path.touch()
-            logger.debug(f"Created file: {file_path}")
-
-        # Test if file is writable
-        with open(file_path, "a"):
-            pass
-        logger.debug(f"Verified file is writable: {file_path}")
+            logger.debug("Created file: %s", file_path)
+        elif not os.access(file_path, os.W_OK):
+            raise OSError(f"File is not writable: {file_path}")
+        logger.debug("Verified file is writable: %s", file_path)
 
     except Exception as e:
         logger.error(f"Failed to ensure file {file_path}: {str(e)}")
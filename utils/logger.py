@@ -4,8 +4,12 @@ This module provides a configured logger instance that can be used throughout
 the application to ensure consistent logging format and behavior.
 """
 
+import atexit
 import logging
+import queue
 import sys
+from functools import lru_cache
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
 from typing import Optional
 from utils.directory_utils import ensure_file
@@ -14,9 +18,12 @@ from utils.directory_utils import ensure_file
 PROJECT_ROOT = Path(__file__).parent.parent
 
 
+@lru_cache(maxsize=1024)
 def get_relative_path(path: str) -> str:
     """Convert an absolute path to a path relative to the project root.
 
+    Log records come from a small set of source files, so results are cached.
+
     Args:
         path: The absolute path to convert
 
@@ -78,12 +85,19 @@ def setup_logger(name: str = "datacation", level: int = logging.INFO, log_file:
     logger.addHandler(console_handler)
 
     # Create file handler if log file is specified
+    # File writes happen on a background listener thread, so logging from the
+    # asyncio event loop only costs a queue put
     if log_file:
         log_path = Path(log_file)
         ensure_file(log_path)
         file_handler = logging.FileHandler(log_file)
         file_handler.setFormatter(file_formatter)
-        logger.addHandler(file_handler)
+
+        log_queue = queue.SimpleQueue()
+        listener = QueueListener(log_queue, file_handler, respect_handler_level=True)
+        listener.start()
+        atexit.register(listener.stop)
+        logger.addHandler(QueueHandler(log_queue))
 
     return logger
 
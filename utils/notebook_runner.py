@@ -1,7 +1,7 @@
 """Utility class for running Jupyter notebooks with proper configuration.
 
 This module provides a NotebookRunner class that handles:
-1. Notebook execution with proper settings
+1. Notebook execution with proper settings (in-process, through nbconvert)
 2. In-place execution support
 3. Conversion file management
 4. Error handling and logging
@@ -11,7 +11,6 @@ References:
 - Jupyter Documentation: https://jupyter.org/documentation
 """
 
-import subprocess
 from pathlib import Path
 import logging
 
@@ -54,13 +53,14 @@ class NotebookRunner:
 
         This method:
         1. Attempts in-place execution if enabled
-        2. Falls back to regular execution if in-place fails
+        2. Falls back to regular execution if writing in place fails
         3. Manages the .nbconvert file based on settings
         4. Handles errors and provides logging
 
         The execution process:
         1. First tries in-place execution for better performance
-        2. If that fails, falls back to regular execution
+        2. If the executed notebook cannot be written in place, falls back to
+           regular execution; cell errors are not retried
         3. Manages the .nbconvert file based on keep_convert setting
         4. Provides detailed logging of the process
         """
@@ -70,7 +70,7 @@ class NotebookRunner:
                 try:
                     self._run_in_place()
                     return
-                except Exception as e:
+                except OSError as e:
                     logger.warning(f"In-place execution failed: {str(e)}")
                     logger.info("Falling back to regular execution")
 
@@ -81,29 +81,52 @@ class NotebookRunner:
             logger.error(f"Error running notebook: {str(e)}", exc_info=True)
             raise
 
+    def _execute(self):
+        """Execute the notebook in this process.
+
+        The notebook is executed with nbconvert's ExecutePreprocessor, with the
+        notebook's directory as working directory, like ``jupyter nbconvert
+        --execute`` but without starting a new interpreter.
+
+        Returns:
+            The executed notebook
+
+        Raises:
+            RuntimeError: If a cell fails; the partially executed notebook is
+                written to the .nbconvert file for inspection
+        """
+        # Imported here: nbconvert and its kernel machinery are only needed to run notebooks
+        import nbformat
+        from nbconvert.preprocessors import CellExecutionError, ExecutePreprocessor
+
+        notebook = nbformat.read(self.notebook_path, as_version=4)
+        try:
+            ExecutePreprocessor().preprocess(notebook, {"metadata": {"path": str(self.notebook_path.parent)}})
+        except CellExecutionError as e:
+            nbconvert_file = self.notebook_path.with_suffix(".nbconvert.ipynb")
+            nbformat.write(notebook, nbconvert_file)
+            raise RuntimeError(f"Error executing notebook (see {nbconvert_file}): {e}") from e
+        return notebook
+
     def _run_in_place(self):
         """Run the notebook in-place.
 
         This method:
-        1. Uses nbconvert to execute the notebook in-place
-        2. Handles the .nbconvert file based on settings
-        3. Provides detailed logging
+        1. Executes the notebook in this process
+        2. Writes the results back to the notebook file
+        3. Handles the .nbconvert file based on settings
+        4. Provides detailed logging
 
         The in-place execution:
         - Is more efficient as it doesn't create a copy
         - Requires proper file permissions
         - May fail in some environments
         """
-        # Build the command
-        cmd = ["jupyter", "nbconvert", "--to", "notebook", "--execute", "--inplace", str(self.notebook_path)]
+        import nbformat
 
-        # Run the command
         logger.info(f"Running notebook in-place: {self.notebook_path}")
-        result = subprocess.run(cmd, capture_output=True, text=True)
-
-        # Check for errors
-        if result.returncode != 0:
-            raise RuntimeError(f"Error executing notebook: {result.stderr}")
+        notebook = self._execute()
+        nbformat.write(notebook, self.notebook_path)
 
         # Handle .nbconvert file
         nbconvert_file = self.notebook_path.with_suffix(".nbconvert.ipynb")
@@ -118,7 +141,7 @@ class NotebookRunner:
         """Run the notebook with regular execution.
 
         This method:
-        1. Uses nbconvert to execute the notebook
+        1. Executes the notebook in this process
         2. Creates a new file with the results
         3. Replaces the original if successful
         4. Provides detailed logging
@@ -128,21 +151,14 @@ class NotebookRunner:
         - Is more reliable but less efficient
         - Always works regardless of file permissions
         """
-        # Build the command
-        cmd = ["jupyter", "nbconvert", "--to", "notebook", "--execute", str(self.notebook_path)]
+        import nbformat
 
-        # Run the command
         logger.info(f"Running notebook: {self.notebook_path}")
-        result = subprocess.run(cmd, capture_output=True, text=True)
-
-        # Check for errors
-        if result.returncode != 0:
-            raise RuntimeError(f"Error executing notebook: {result.stderr}")
+        notebook = self._execute()
 
-        # Get the output file
+        # Write the output file
         output_file = self.notebook_path.with_suffix(".nbconvert.ipynb")
-        if not output_file.exists():
-            raise FileNotFoundError(f"Output file not found: {output_file}")
+        nbformat.write(notebook, output_file)
 
         # Replace the original file
         logger.info("Replacing original notebook with executed version")
@@ -0,0 +1,535 @@
+"""Response cache for agent answers.
+
+This module provides a two-tier cache that sits in front of the chat agent:
+
+1. An exact-match tier keyed on the SHA-256 of the normalized prompt, the model
+   name and the temperature, so repeated questions (such as the suggested prompts)
+   never reach the LLM twice.
+2. A semantic tier that embeds the normalized prompt with a sentence-transformer
+   model and returns the answer of the most similar earlier prompt when the cosine
+   similarity exceeds a threshold and both prompts name the same entities (see
+   prompt_entities), so "how many men survived" never gets the answer to "how many
+   women survived".
+
+The semantic tier is optional: when ``sentence_transformers`` is not installed
+the cache silently degrades to exact matching only. Embeddings are computed by a
+single pooled model per process, and concurrent requests are encoded together
+in one batch on a worker thread. Embeddings are stored as int8; similarity
+search is an int8 dot product, or a FAISS IVF-PQ index once enough prompts are
+cached and ``faiss`` is installed.
+"""
+
+import asyncio
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+import numpy as np
+
+from utils.logger import logger
+
+try:
+    import faiss
+except ImportError:
+    faiss = None
+
+# Default embedding model for the semantic tier
+DEFAULT_EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+# Terms that select a different subgroup of passengers, and so a different answer
+_ENTITY_PATTERNS = (
+    ("sex:female", re.compile(r"\b(?:females?|wom[ae]n|girls?|ladies)\b")),
+    ("sex:male", re.compile(r"\b(?:males?|m[ae]n|boys?|gentlemen)\b")),
+    ("class:1", re.compile(r"\b(?:first|1st)[- ]class\b|\bclass[- ]?1\b")),
+    ("class:2", re.compile(r"\b(?:second|2nd)[- ]class\b|\bclass[- ]?2\b")),
+    ("class:3", re.compile(r"\b(?:third|3rd)[- ]class\b|\bclass[- ]?3\b")),
+    ("survived", re.compile(r"\b(?:survived|survivors?|surviving)\b")),
+    ("died", re.compile(r"\b(?:died|dead|perished|non-survivors?|did not survive)\b")),
+    ("port:C", re.compile(r"\bcherbourg\b")),
+    ("port:Q", re.compile(r"\bqueenstown\b")),
+    ("port:S", re.compile(r"\bsouthampton\b")),
+)
+_NUMBER_RE = re.compile(r"\d+(?:\.\d+)?")
+
+# Loaded sentence-transformer models by name (None if loading failed)
+_ENCODERS: Dict[str, Any] = {}
+
+# Embedding batchers by model name
+_EMBED_BATCHERS: Dict[str, "EmbedBatcher"] = {}
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Normalize a prompt for cache lookups.
+
+    Args:
+        prompt: The raw user prompt
+
+    Returns:
+        The prompt stripped, lowercased and with whitespace collapsed
+    """
+    return _WHITESPACE_RE.sub(" ", prompt.strip().lower())
+
+
+def prompt_entities(normalized: str) -> FrozenSet[str]:
+    """Find the entities of a normalized prompt that a cached answer depends on.
+
+    These are the passenger subgroups it names (sex, class, survival, port) and
+    every number in it, e.g. "average fare of women in first class over 30" gives
+    {"sex:female", "class:1", "30"}.
+
+    Args:
+        normalized: The prompt, normalized with normalize_prompt
+
+    Returns:
+        The entity labels and numbers in the prompt
+    """
+    labels = {label for label, pattern in _ENTITY_PATTERNS if pattern.search(normalized)}
+    labels.update(_NUMBER_RE.findall(normalized))
+    return frozenset(labels)
+
+
+def load_encoder(model_name: str) -> Any:
+    """Load a sentence-transformer model once per process.
+
+    Args:
+        model_name: Name of the sentence-transformer model
+
+    Returns:
+        The shared model, or None if it could not be loaded
+    """
+    if model_name not in _ENCODERS:
+        from config import config
+
+        try:
+            from sentence_transformers import SentenceTransformer
+
+            if config.app.embedding_num_threads:
+                import torch
+
+                # Opt-in, as this limits every PyTorch computation of the process
+                torch.set_num_threads(config.app.embedding_num_threads)
+            _ENCODERS[model_name] = SentenceTransformer(model_name)
+        except Exception as e:
+            logger.warning(f"Semantic cache disabled, could not load embedding model: {str(e)}")
+            _ENCODERS[model_name] = None
+    return _ENCODERS[model_name]
+
+
+class EmbedBatcher:
+    """Encode concurrent embedding requests together on a worker thread.
+
+    Requests that arrive while a batch is being encoded are collected and
+    encoded as the next batch, so the model is called once per batch instead of
+    once per prompt, and the event loop is never blocked by inference.
+
+    Attributes:
+        model_name: Name of the sentence-transformer model
+        max_batch_size: Maximum number of texts encoded in a single call
+    """
+
+    def __init__(self, model_name: str = DEFAULT_EMBEDDING_MODEL, max_batch_size: int = 32):
+        """Initialize the batcher.
+
+        Args:
+            model_name: Name of the sentence-transformer model
+            max_batch_size: Maximum number of texts encoded in a single call
+        """
+        self.model_name = model_name
+        self.max_batch_size = max_batch_size
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def embed(self, text: str) -> Optional[np.ndarray]:
+        """Embed a text.
+
+        Args:
+            text: The text to embed
+
+        Returns:
+            A unit-length float32 embedding, or None if no model is available
+        """
+        if self._task is None or self._task.done():
+            self._queue = asyncio.Queue()
+            self._task = asyncio.create_task(self.run())
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((text, future))
+        return await future
+
+    async def run(self) -> None:
+        """Collect queued texts into batches and encode them."""
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.max_batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            try:
+                encoder = await asyncio.to_thread(load_encoder, self.model_name)
+                if encoder is None:
+                    results = [None] * len(batch)
+                else:
+                    embeddings = await asyncio.to_thread(
+                        encoder.encode,
+                        [text for text, _ in batch],
+                        batch_size=len(batch),
+                        normalize_embeddings=True,
+                        show_progress_bar=False,
+                    )
+                    results = list(np.asarray(embeddings, dtype=np.float32))
+            except Exception as e:
+                logger.error(f"Error computing embeddings: {str(e)}", exc_info=True)
+                results = [None] * len(batch)
+
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+
+def get_embed_batcher(model_name: str = DEFAULT_EMBEDDING_MODEL) -> EmbedBatcher:
+    """Return the shared embedding batcher for a model.
+
+    Args:
+        model_name: Name of the sentence-transformer model
+
+    Returns:
+        The process-wide EmbedBatcher for this model
+    """
+    if model_name not in _EMBED_BATCHERS:
+        _EMBED_BATCHERS[model_name] = EmbedBatcher(model_name)
+    return _EMBED_BATCHERS[model_name]
+
+
+# Scale of the symmetric int8 quantization; embeddings are unit length, so every
+# component lies in [-1, 1]
+INT8_SCALE = 127
+
+
+def quantize(vector: np.ndarray) -> np.ndarray:
+    """Quantize unit-length float embeddings to int8.
+
+    Args:
+        vector: One or more unit-length float embeddings
+
+    Returns:
+        The int8 embeddings (component * 127, rounded)
+    """
+    return np.clip(np.rint(vector * INT8_SCALE), -INT8_SCALE, INT8_SCALE).astype(np.int8)
+
+
+class VectorIndex:
+    """Inner-product search over unit-length embeddings.
+
+    Vectors are stored quantized to int8 in a growable NumPy matrix (a quarter
+    the size of float32), which is the source of truth for (re)building the
+    FAISS index. Below ``ivf_threshold`` vectors, search is a single int8
+    matrix-vector product with int32 accumulation. From there on, and when
+    FAISS is installed, an IVF-PQ index is trained on all stored vectors (and
+    retrained whenever the number of vectors doubles); its top candidates are
+    re-scored exactly against the int8 matrix. The threshold defaults to 40
+    vectors per IVF partition, and the PQ code size is fitted to the number of
+    training vectors, so neither quantizer is trained on too few points.
+
+    Removed vectors are masked out of every search at once, and their rows are
+    dropped once they make up a quarter of the matrix.
+
+    All methods are thread-safe so they can run in ``asyncio.to_thread``.
+
+    Attributes:
+        keys: Cache key of every stored row (including removed rows), aligned with the rows
+        ivf_threshold: Number of vectors from which an IVF-PQ index is used (default 40 * nlist)
+        nlist: Number of IVF partitions
+        nprobe: Number of IVF partitions searched per query
+        pq_m: Number of product-quantization sub-vectors (bytes per code)
+        rerank: Number of IVF-PQ candidates re-scored exactly
+    """
+
+    def __init__(
+        self, ivf_threshold: Optional[int] = None, nlist: int = 64, nprobe: int = 8, pq_m: int = 48, rerank: int = 4
+    ):
+        self.keys: List[str] = []
+        self.ivf_threshold = ivf_threshold if ivf_threshold is not None else 40 * nlist
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.pq_m = pq_m
+        self.rerank = rerank
+        self._vectors: Optional[np.ndarray] = None
+        self._live: Optional[np.ndarray] = None
+        self._rows: Dict[str, int] = {}
+        self._index: Any = None
+        self._trained_size = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def add(self, key: str, vector: np.ndarray) -> None:
+        """Add a vector, replacing any vector stored for the key.
+
+        Args:
+            key: Cache key the vector belongs to
+            vector: Unit-length float32 embedding
+        """
+        with self._lock:
+            self._remove(key)
+            size = len(self.keys)
+            if self._vectors is None:
+                self._vectors = np.empty((16, vector.shape[0]), dtype=np.int8)
+                self._live = np.zeros(16, dtype=bool)
+            elif size == self._vectors.shape[0]:
+                # Grow geometrically so adding stays amortized O(1)
+                grown = np.empty((2 * size, self._vectors.shape[1]), dtype=np.int8)
+                grown[:size] = self._vectors
+                self._vectors = grown
+                self._live = np.concatenate([self._live, np.zeros(size, dtype=bool)])
+            self._vectors[size] = quantize(vector)
+            self._live[size] = True
+            self._rows[key] = size
+            self.keys.append(key)
+
+            if faiss is None or size + 1 < self.ivf_threshold:
+                return
+            if self._index is None or size + 1 >= 2 * self._trained_size:
+                self._rebuild()
+            else:
+                self._index.add(vector.reshape(1, -1))
+
+    def remove(self, key: str) -> None:
+        """Remove the vector of a key, if stored.
+
+        Args:
+            key: Cache key whose vector is removed
+        """
+        with self._lock:
+            self._remove(key)
+
+    def _remove(self, key: str) -> None:
+        """Mask the row of a key and compact the matrix if enough rows are masked (lock must be held)."""
+        row = self._rows.pop(key, None)
+        if row is None:
+            return
+        self._live[row] = False
+        if 4 * (len(self.keys) - len(self._rows)) >= len(self.keys):
+            self._compact()
+
+    def _compact(self) -> None:
+        """Drop the masked rows and rebuild the IVF-PQ index if one is used (lock must be held)."""
+        keep = np.flatnonzero(self._live[: len(self.keys)])
+        self.keys = [self.keys[i] for i in keep]
+        self._rows = {key: row for row, key in enumerate(self.keys)}
+        capacity = max(16, len(self.keys))
+        vectors = np.empty((capacity, self._vectors.shape[1]), dtype=np.int8)
+        vectors[: len(keep)] = self._vectors[keep]
+        self._vectors = vectors
+        self._live = np.zeros(capacity, dtype=bool)
+        self._live[: len(keep)] = True
+        self._index = None
+        self._trained_size = 0
+        if faiss is not None and len(self.keys) >= self.ivf_threshold:
+            self._rebuild()
+
+    def _scores(self, rows: Any, query: np.ndarray) -> np.ndarray:
+        """Cosine similarities between stored rows and a query (int8 dot products)."""
+        products = np.einsum("ij,j->i", self._vectors[rows], quantize(query), dtype=np.int32)
+        return products / (INT8_SCALE * INT8_SCALE)
+
+    def search(self, query: np.ndarray) -> Tuple[float, Optional[str]]:
+        """Find the most similar stored vector.
+
+        Args:
+            query: Unit-length float32 query embedding
+
+        Returns:
+            The cosine similarity and cache key of the best match, or (-1.0, None) if empty
+        """
+        with self._lock:
+            if not self._rows:
+                return -1.0, None
+
+            if self._index is not None:
+                _, ids = self._index.search(query.reshape(1, -1), self.rerank)
+                candidates = ids[0][ids[0] >= 0]
+                candidates = candidates[self._live[candidates]]
+                if not len(candidates):
+                    return -1.0, None
+                similarities = self._scores(candidates, query)
+                best = int(np.argmax(similarities))
+                return float(similarities[best]), self.keys[int(candidates[best])]
+
+            size = len(self.keys)
+            similarities = np.where(self._live[:size], self._scores(slice(0, size), query), -np.inf)
+            best = int(np.argmax(similarities))
+            return float(similarities[best]), self.keys[best]
+
+    def _rebuild(self) -> None:
+        """Train and fill the IVF-PQ index from all stored vectors (lock must be held)."""
+        vectors = self._vectors[: len(self.keys)].astype(np.float32) / INT8_SCALE
+        dim = vectors.shape[1]
+        quantizer = faiss.IndexFlatIP(dim)
+        if dim % self.pq_m == 0:
+            # k-means needs about 39 training points per centroid, for the 2**nbits PQ centroids too
+            nbits = int(np.clip(np.floor(np.log2(len(vectors) / 39)), 1, 8))
+            index = faiss.IndexIVFPQ(quantizer, dim, self.nlist, self.pq_m, nbits, faiss.METRIC_INNER_PRODUCT)
+        else:
+            index = faiss.IndexIVFFlat(quantizer, dim, self.nlist, faiss.METRIC_INNER_PRODUCT)
+        index.train(vectors)
+        index.nprobe = self.nprobe
+        index.add(vectors)
+        self._index = index
+        self._trained_size = len(vectors)
+
+
+@dataclass
+class CachedResponse:
+    """A cached agent response.
+
+    Attributes:
+        answer: The final answer returned by the agent
+        token_usage: Input, output, and total tokens of the original (uncached) call
+    """
+
+    answer: str
+    token_usage: Tuple[int, int, int] = (0, 0, 0)
+
+
+class SemanticCache:
+    """Two-tier (exact + semantic) cache for agent responses.
+
+    Attributes:
+        model_name: Name of the LLM whose answers are cached
+        temperature: Temperature of the LLM whose answers are cached
+        maxsize: Maximum number of cached responses
+        similarity_threshold: Minimum cosine similarity for a semantic hit; the
+            prompts must also have the same prompt_entities
+        embedding_model: Name of the sentence-transformer model for the semantic tier
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        temperature: float,
+        maxsize: int = 1024,
+        similarity_threshold: float = 0.92,
+        embedding_model: str = DEFAULT_EMBEDDING_MODEL,
+    ):
+        """Initialize the cache.
+
+        Args:
+            model_name: Name of the LLM whose answers are cached
+            temperature: Temperature of the LLM whose answers are cached
+            maxsize: Maximum number of cached responses
+            similarity_threshold: Minimum cosine similarity for a semantic hit
+            embedding_model: Name of the sentence-transformer model for the semantic tier
+        """
+        self.model_name = model_name
+        self.temperature = temperature
+        self.maxsize = maxsize
+        self.similarity_threshold = similarity_threshold
+        self.embedding_model = embedding_model
+
+        # Exact tier: LRU of cache key -> response
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+
+        # Entities of the prompt behind each cache key, checked on semantic hits
+        self._entities: Dict[str, FrozenSet[str]] = {}
+
+        # Semantic tier: one embedding per cache key
+        self._index = VectorIndex()
+        self._embedder = get_embed_batcher(embedding_model)
+        self._semantic_enabled = True
+
+    def _key(self, normalized: str) -> str:
+        """Build the exact-match key for a normalized prompt."""
+        raw = f"{self.model_name}\x00{self.temperature}\x00{normalized}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    async def _embed(self, normalized: str) -> Optional[np.ndarray]:
+        """Embed a normalized prompt through the shared embedding batcher.
+
+        Args:
+            normalized: The normalized prompt
+
+        Returns:
+            A unit-length embedding vector, or None if the semantic tier is unavailable
+        """
+        if not self._semantic_enabled:
+            return None
+        embedding = await self._embedder.embed(normalized)
+        if embedding is None:
+            self._semantic_enabled = False
+        return embedding
+
+    async def get(self, prompt: str) -> Optional[CachedResponse]:
+        """Look up a cached response for a prompt.
+
+        Args:
+            prompt: The user prompt
+
+        Returns:
+            The cached response, or None on a cache miss
+        """
+        normalized = normalize_prompt(prompt)
+        key = self._key(normalized)
+
+        cached = self._entries.get(key)
+        if cached is not None:
+            self._entries.move_to_end(key)
+            logger.debug(f"Exact cache hit for prompt: {prompt}")
+            return cached
+
+        if not len(self._index):
+            return None
+
+        query = await self._embed(normalized)
+        if query is None:
+            return None
+
+        # Embeddings are unit length, so the inner product is the cosine similarity
+        similarity, best_key = await asyncio.to_thread(self._index.search, query)
+        if best_key is None or similarity < self.similarity_threshold:
+            return None
+
+        # A close paraphrase about another subgroup (or number) has another answer
+        if self._entities.get(best_key) != prompt_entities(normalized):
+            logger.debug(f"Semantic match ({similarity:.3f}) rejected, entities differ for prompt: {prompt}")
+            return None
+
+        cached = self._entries.get(best_key)
+        if cached is not None:
+            logger.debug(f"Semantic cache hit ({similarity:.3f}) for prompt: {prompt}")
+        return cached
+
+    async def put(self, prompt: str, response: CachedResponse, embedding: Optional[np.ndarray] = None) -> None:
+        """Store a response for a prompt.
+
+        Args:
+            prompt: The user prompt
+            response: The response to cache
+            embedding: Unit-length embedding of the prompt by the embedding model,
+                if already computed; otherwise the prompt is embedded here
+        """
+        normalized = normalize_prompt(prompt)
+        key = self._key(normalized)
+        is_new = key not in self._entries
+
+        self._entries[key] = response
+        self._entries.move_to_end(key)
+        self._entities[key] = prompt_entities(normalized)
+        while len(self._entries) > self.maxsize:
+            evicted, _ = self._entries.popitem(last=False)
+            del self._entities[evicted]
+            # An evicted entry must not be found by a semantic lookup
+            await asyncio.to_thread(self._index.remove, evicted)
+
+        if not is_new:
+            return
+
+        if embedding is None:
+            embedding = await self._embed(normalized)
+        if embedding is None:
+            return
+
+        await asyncio.to_thread(self._index.add, key, embedding)